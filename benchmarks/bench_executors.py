@@ -0,0 +1,86 @@
+"""
+Thread pool vs process pool for the render stage (apply_layout on a fresh canvas,
+plus PNG encoding unless --no-encode).
+
+Event info is extracted up front with the rules extractor, so only rendering is
+timed. Each pool size in --workers renders the same seeded corpus through
+  threads   - a ThreadPoolExecutor, as async_api uses by default
+  processes - a ProcessPoolExecutor, with its workers started before timing
+and serial runs the corpus in this thread for reference. Threads only scale as far
+as the work is spent in Pillow's C code with the GIL released; the planning
+(fit, place, scoring) is Python and holds it. Reports posters/sec per pool:
+    python benchmarks/bench_executors.py --count 200 --workers 1 2 4 8 --json executors.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_render import make_corpus
+from async_api import render_encoded
+from extractors import get_extractor
+from poster_generator import render_poster
+
+def render_task(job):
+    """One poster; module-level so process pools can pickle it."""
+    info, seed, encode = job
+    if encode:
+        return len(render_encoded(info, seed=seed, encode_options={"compress_level": 1}))
+    render_poster(info, rng=random.Random(seed)).close()
+    return 0
+
+def run(executor, jobs):
+    start = time.perf_counter()
+    list(executor.map(render_task, jobs, chunksize=1))
+    return time.perf_counter() - start
+
+class SerialExecutor:
+    def map(self, fn, items, chunksize=1):
+        return map(fn, items)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--no-encode", action="store_true", help="Time rendering only")
+    parser.add_argument("--json", metavar="FILE", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    extractor = get_extractor("rules")
+    jobs = [(extractor.extract(text), args.seed + i, not args.no_encode)
+            for i, text in enumerate(make_corpus(args.count, args.seed))]
+
+    # Fill the font, measurement and sprite caches once, so no pool pays for them
+    # and forked workers inherit them warm
+    run(SerialExecutor(), jobs)
+    results = [{"pool": "serial", "workers": 1, "seconds": run(SerialExecutor(), jobs)}]
+    for workers in args.workers:
+        with ThreadPoolExecutor(workers) as pool:
+            run(pool, jobs[:workers])
+            results.append({"pool": "threads", "workers": workers, "seconds": run(pool, jobs)})
+        with ProcessPoolExecutor(workers) as pool:
+            run(pool, jobs[:workers])
+            results.append({"pool": "processes", "workers": workers, "seconds": run(pool, jobs)})
+
+    print(f"{os.cpu_count()} CPUs, {args.count} posters{'' if args.no_encode else ' incl. PNG encode'}")
+    print(f"{'pool':>10} {'workers':>8} {'posters/s':>10}")
+    for row in results:
+        row["posters_per_s"] = args.count / row["seconds"]
+        print(f"{row['pool']:>10} {row['workers']:>8} {row['posters_per_s']:>10.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"count": args.count, "cpus": os.cpu_count(), "encode": not args.no_encode,
+                       "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Extractor backend benchmark and agreement report.
+
+Runs the spaCy, rule-based and hybrid backends over a fixture corpus, reports
+texts/sec for each, and how often the rules and hybrid backends return exactly
+what spaCy returns (overall and per field). The extraction cache is disabled so
+every text is really extracted.
+
+Run from the repository root:
+    python benchmarks/bench_extractors.py --repeat 20
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import event_extractor
+from extractors import HybridExtractor, RuleExtractor, SpacyExtractor
+
+FIELDS = ("event_name", "date", "location")
+
+def load_corpus(path):
+    return [line.strip() for line in Path(path).read_text(encoding="utf-8").splitlines() if line.strip()]
+
+def throughput(extractor, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = list(extractor.extract_many(texts))
+    elapsed = time.perf_counter() - start
+    return results, len(texts) * repeat / elapsed
+
+def agreement(results, reference):
+    total = len(reference)
+    report = {"exact": sum(r == ref for r, ref in zip(results, reference)) / total}
+    for field in FIELDS:
+        report[field] = sum(r[field] == ref[field] for r, ref in zip(results, reference)) / total
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=str(ROOT / "benchmarks/fixtures/events.txt"))
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--show-disagreements", action="store_true")
+    parser.add_argument("--json", metavar="FILE", help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    texts = load_corpus(args.corpus)
+    event_extractor.configure_cache(maxsize=0)
+    spacy_backend = SpacyExtractor()
+    spacy_backend.warm_up()
+
+    report = {}
+    reference, rate = throughput(spacy_backend, texts, args.repeat)
+    report["spacy"] = {"texts_per_sec": rate}
+
+    for backend in (RuleExtractor(), HybridExtractor(fallback=spacy_backend)):
+        results, rate = throughput(backend, texts, args.repeat)
+        report[backend.name] = {"texts_per_sec": rate, "agreement": agreement(results, reference)}
+        if isinstance(backend, HybridExtractor):
+            report[backend.name]["fallback_rate"] = backend.fallbacks / (backend.fallbacks + backend.rule_hits)
+        if args.show_disagreements:
+            for text, got, want in zip(texts, results, reference):
+                if got != want:
+                    print(f"[{backend.name}] {text!r}\n    got  {got}\n    want {want}")
+
+    print(f"{'backend':<8} {'texts/sec':>10} {'exact':>7} " + " ".join(f"{f:>10}" for f in FIELDS))
+    for name, row in report.items():
+        agree = row.get("agreement")
+        cells = " ".join(f"{agree[f]:>10.1%}" for f in FIELDS) if agree else ""
+        exact = f"{agree['exact']:>7.1%}" if agree else f"{'-':>7}"
+        print(f"{name:<8} {row['texts_per_sec']:>10.0f} {exact} {cells}")
+    if "fallback_rate" in report.get("hybrid", {}):
+        print(f"hybrid sent {report['hybrid']['fallback_rate']:.1%} of texts to spaCy")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
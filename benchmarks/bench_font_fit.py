@@ -0,0 +1,132 @@
+"""
+Font fitting benchmark: binary/analytic fit_text_size versus the old 5pt shrink loop.
+
+Fits long event titles at the title sizes and rotations apply_layout uses and
+reports time per fit, font measurements per fit and the size each method picked.
+"cold" clears the font and measurement caches before every fit (a new poster with unseen sizes),
+"warm" keeps it (steady state inside a batch).
+
+Run from the repository root:
+    python benchmarks/bench_font_fit.py
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import font_cache
+import layout
+import text_metrics
+from layout import WIDTH, HEIGHT, fit_text_size, get_rotated_bbox
+
+TITLES = [
+    "International Symposium on Sustainable Urban Architecture",
+    "Annual Midsummer Community Jazz and Blues Festival",
+    "Neighbourhood Repair Cafe and Bicycle Maintenance Workshop",
+    "Open Source Machine Learning Infrastructure Summit",
+    "Late Night Silent Disco at the Botanical Gardens",
+    "Experimental Electronic Music Showcase",
+]
+ROTATIONS = [15, -15, 90, -90]
+
+def linear_fit(text, preferred_position, font_path, size, stretch_factor, rotation, occupied_areas, min_size=20):
+    """The pre-binary-search loop from draw_event_text, without the drawing."""
+    current_size = size
+    while current_size >= min_size:
+        font = font_cache.get_font(font_path, int(current_size * stretch_factor))
+        text_width, text_height = layout.get_text_dimensions(text, font)
+        if rotation != 0:
+            text_width, text_height = get_rotated_bbox(text_width, text_height, rotation)
+        if (preferred_position[0] + text_width > WIDTH or
+                preferred_position[1] + text_height > HEIGHT):
+            current_size -= 5
+            continue
+        overlaps = False
+        for (ox1, oy1, ox2, oy2) in occupied_areas:
+            if not (preferred_position[0] + text_width < ox1 or
+                    preferred_position[0] > ox2 or
+                    preferred_position[1] + text_height < oy1 or
+                    preferred_position[1] > oy2):
+                overlaps = True
+                break
+        if overlaps:
+            current_size -= 5
+            continue
+        return font, text_width, text_height
+    return None
+
+def binary_fit(text, preferred_position, font_path, size, stretch_factor, rotation, occupied_areas):
+    return fit_text_size(
+        text, preferred_position, font_path, size,
+        stretch_factor=stretch_factor, rotation=rotation, occupied_areas=occupied_areas
+    )
+
+def make_cases(count, seed):
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(count):
+        title = rng.choice(TITLES)
+        cases.append(dict(
+            text=title,
+            preferred_position=(rng.randint(50, 400), rng.randint(50, 400)),
+            size=min(220, max(120, 2000 // len(title))),
+            stretch_factor=rng.uniform(0.8, 1.6),
+            rotation=rng.choice(ROTATIONS),
+            occupied_areas=[(rng.randint(0, 600), 900, 1000, 1100)],
+        ))
+    return cases
+
+def run(method, cases, font_path, cold):
+    measurements = 0
+    real_measure = layout.get_text_dimensions
+
+    def counting_measure(text, font):
+        nonlocal measurements
+        measurements += 1
+        return real_measure(text, font)
+
+    layout.get_text_dimensions = counting_measure
+    timings, sizes = [], []
+    try:
+        for case in cases:
+            if cold:
+                font_cache.clear_font_cache()
+                text_metrics.clear_measure_cache()
+            start = time.perf_counter()
+            result = method(font_path=font_path, **case)
+            timings.append(time.perf_counter() - start)
+            sizes.append(result[0].size if result else None)
+    finally:
+        layout.get_text_dimensions = real_measure
+    return timings, measurements / len(cases), sizes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--font", default=str(ROOT / "data/fonts/Roboto-Bold.ttf"))
+    args = parser.parse_args()
+
+    cases = make_cases(args.cases, args.seed)
+    print(f"{'method':<8} {'cache':<5} {'ms/fit':>8} {'p95 ms':>8} {'measures':>9}")
+    results = {}
+    for cold in (True, False):
+        for name, method in (("linear", linear_fit), ("binary", binary_fit)):
+            timings, measures, sizes = run(method, cases, args.font, cold)
+            results[name] = sizes
+            p95 = statistics.quantiles(timings, n=20)[-1]
+            print(f"{name:<8} {'cold' if cold else 'warm':<5} "
+                  f"{statistics.mean(timings) * 1000:>8.2f} {p95 * 1000:>8.2f} {measures:>9.1f}")
+
+    diffs = [b - l for l, b in zip(results["linear"], results["binary"]) if l and b]
+    if diffs:
+        print(f"binary picks {statistics.mean(diffs):+.1f}pt on average "
+              f"(it searches every size, the loop only every 5pt)")
+
+if __name__ == "__main__":
+    main()
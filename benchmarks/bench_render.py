@@ -0,0 +1,187 @@
+"""
+End-to-end poster rendering benchmark with a per-stage breakdown.
+
+Renders a fixed, seeded corpus of event strings of varied length (the layout's
+rotation choices are seeded per poster too) and reports posters/sec,
+p50/p95/p99 latency, peak RSS and where the time goes:
+  extract    - event info extraction
+  fit        - font size search (fit_text_size)
+  place      - free-position search for blocks that did not fit where they wanted
+  rasterize  - drawing, rotating and pasting the planned text
+  layout     - everything else in render_poster (specs, scoring, canvas)
+  encode     - img.save to PNG
+Stage times come from the pipeline's tracing spans, and the tracing counters
+(fit measurements, placement outcomes, cache hits) are included in the JSON.
+
+--size renders at another resolution; peak memory is reported against the RSS
+before the first poster and the canvas size, e.g. for print:
+    python benchmarks/bench_render.py --count 20 --size 4320x5400
+
+Results are written as JSON so runs can be compared across commits:
+    python benchmarks/bench_render.py --count 200 --json bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import poster_generator
+import tracing
+from extractors import get_extractor
+from main import parse_size
+
+NAME_WORDS = [
+    "Jazz", "Night", "Summer", "Tech", "Conference", "Art", "Fair", "Open", "Air", "Cinema",
+    "Poetry", "Slam", "Vinyl", "Market", "Design", "Week", "Indie", "Game", "Showcase",
+    "International", "Symposium", "Sustainable", "Urban", "Architecture", "Community",
+    "Festival", "Workshop", "Late", "Silent", "Disco", "Experimental", "Electronic", "Music",
+]
+DATES = ["March 5", "July 12", "May 3", "14 September", "October 2nd, 2025", "Saturday",
+         "next weekend", "December 31", "2025-03-18", "Feb 11"]
+LOCATIONS = ["Berlin", "Tokyo", "Paris", "Vienna", "London", "Amsterdam", "Milan",
+             "San Francisco", "Rio de Janeiro", "Copenhagen", "New York", "Oslo"]
+
+STAGES = ("extract", "fit", "place", "rasterize", "layout", "encode")
+
+def make_corpus(count, seed):
+    """Event strings with names of 1 to 8 words, so title sizes and wrap/shrink work vary."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        name = " ".join(rng.choice(NAME_WORDS) for _ in range(rng.randint(1, 8)))
+        corpus.append(f"{name} on {rng.choice(DATES)} in {rng.choice(LOCATIONS)}")
+    return corpus
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else values[0]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--extractor", default="spacy", choices=["spacy", "rules", "hybrid"])
+    parser.add_argument("--warmup", type=int, default=3, help="Posters rendered before timing starts")
+    parser.add_argument("--size", type=parse_size, metavar="WxH", help="Render at this size instead of the design size")
+    parser.add_argument("--json", metavar="FILE", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.count + args.warmup, args.seed)
+    extractor = get_extractor(args.extractor)
+    extractor.warm_up()
+
+    target_size = args.size or (poster_generator.WIDTH, poster_generator.HEIGHT)
+    # Pillow stores RGB with 4 bytes per pixel
+    canvas_mb = target_size[0] * target_size[1] * 4 / 2**20
+    rss_before = rss_mb()
+
+    tracer = tracing.MetricsTracer()
+    latencies = []
+    failures = 0
+    with tempfile.TemporaryDirectory() as out_dir:
+        for i, text in enumerate(corpus):
+            if i == args.warmup:
+                # Warm-up posters only fill the caches
+                tracing.set_tracer(tracer)
+            random.seed(args.seed + i)
+            start = time.perf_counter()
+            try:
+                with tracing.span("extract"):
+                    info = extractor.extract(text)
+                img = poster_generator.render_poster(info, target_size=args.size)
+                with tracing.span("encode"):
+                    img.save(Path(out_dir) / f"poster-{i}.png")
+                img.close()
+            except Exception as e:
+                failures += 1
+                print(f"poster {i} failed: {e}", file=sys.stderr)
+                continue
+            if i >= args.warmup:
+                latencies.append(time.perf_counter() - start)
+    tracing.set_tracer(None)
+
+    snapshot = tracer.snapshot()
+    spans = snapshot["spans"]
+
+    def total(name):
+        return spans.get(name, {}).get("total_s", 0.0)
+
+    totals = {stage: total(stage) for stage in ("extract", "fit", "place", "rasterize", "encode")}
+    # Whatever render spends outside measuring, placing and drawing the text blocks
+    totals["layout"] = total("render") - total("fit") - total("place") - total("rasterize")
+    wall = sum(latencies)
+    rendered_count = len(latencies)
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "count": args.count,
+            "seed": args.seed,
+            "extractor": args.extractor,
+            "size": list(target_size),
+        },
+        "posters": rendered_count,
+        "failures": failures,
+        "posters_per_sec": rendered_count / wall if wall else 0.0,
+        "latency_ms": {
+            "mean": statistics.mean(latencies) * 1000 if latencies else None,
+            "p50": percentile(latencies, 50) * 1000 if latencies else None,
+            "p95": percentile(latencies, 95) * 1000 if latencies else None,
+            "p99": percentile(latencies, 99) * 1000 if latencies else None,
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_before_mb": rss_before,
+        "canvas_mb": canvas_mb,
+        "stages": {
+            stage: {
+                "total_s": totals[stage],
+                "ms_per_poster": totals[stage] / rendered_count * 1000 if rendered_count else 0.0,
+                "share": totals[stage] / wall if wall else 0.0,
+            }
+            for stage in STAGES
+        },
+        "counters": snapshot["counters"],
+    }
+
+    latency = results["latency_ms"]
+    print(f"{rendered_count} posters, {failures} failed, {results['posters_per_sec']:.1f} posters/sec")
+    if latencies:
+        print(f"latency ms: p50 {latency['p50']:.1f}  p95 {latency['p95']:.1f}  p99 {latency['p99']:.1f}")
+    print(f"peak RSS: {results['peak_rss_mb']:.1f} MB, {results['peak_rss_mb'] - rss_before:+.1f} MB over "
+          f"the {rss_before:.1f} MB before rendering; canvas {target_size[0]}x{target_size[1]} is {canvas_mb:.1f} MB")
+    for stage, row in results["stages"].items():
+        print(f"  {stage:<10} {row['ms_per_poster']:>8.2f} ms/poster {row['share']:>7.1%}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Background shape drawing: one ImageDraw call per shape vs shapes.ShapeBatch.
+
+For 10, 100, 1000 and 10000 random shapes on a poster-sized canvas, times
+  per-call   - draw_random_shape() straight onto the RGB canvas
+  batch      - draw_random_shape(batch=...) then ShapeBatch.render()
+  vectorized - random_shape_batch() (NumPy parameters) then render()
+per-call and batch draw the same shapes, and the script checks they produce
+identical pixels:
+    python benchmarks/bench_shapes.py --repeat 5 --json shapes.json
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from PIL import Image, ImageDraw
+from shapes import ShapeBatch, draw_random_shape, random_shape_batch
+
+WIDTH, HEIGHT = 1080, 1350
+PALETTE = [(255, 100, 100), (50, 50, 50), (255, 255, 100)]
+BACKGROUND = (20, 20, 30)
+
+def per_call(count, seed):
+    img = Image.new("RGB", (WIDTH, HEIGHT), BACKGROUND)
+    draw = ImageDraw.Draw(img)
+    rng = random.Random(seed)
+    for _ in range(count):
+        draw_random_shape(draw, PALETTE, WIDTH, HEIGHT, rng)
+    return img
+
+def batched(count, seed):
+    img = Image.new("RGB", (WIDTH, HEIGHT), BACKGROUND)
+    batch = ShapeBatch()
+    rng = random.Random(seed)
+    for _ in range(count):
+        draw_random_shape(None, PALETTE, WIDTH, HEIGHT, rng, batch=batch)
+    batch.render(img)
+    return img
+
+def vectorized(count, seed):
+    img = Image.new("RGB", (WIDTH, HEIGHT), BACKGROUND)
+    random_shape_batch(count, PALETTE, WIDTH, HEIGHT, seed=seed).render(img)
+    return img
+
+METHODS = {"per-call": per_call, "batch": batched, "vectorized": vectorized}
+
+def best_of(fn, count, seed, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(count, seed)
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", metavar="FILE", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    # Warm up imports and Pillow's code paths
+    for fn in METHODS.values():
+        fn(10, args.seed)
+
+    results = []
+    print(f"{'shapes':>7} " + " ".join(f"{name:>12}" for name in METHODS) + "   speedup  identical")
+    for count in args.counts:
+        row = {"shapes": count}
+        for name, fn in METHODS.items():
+            best, median = best_of(fn, count, args.seed, args.repeat)
+            row[name] = {"best_ms": best * 1000, "median_ms": median * 1000}
+        row["identical"] = per_call(count, args.seed).tobytes() == batched(count, args.seed).tobytes()
+        speedup = row["per-call"]["best_ms"] / row["batch"]["best_ms"]
+        results.append(row)
+        print(f"{count:>7} " + " ".join(f"{row[name]['best_ms']:>10.1f}ms" for name in METHODS)
+              + f"   {speedup:>6.2f}x  {row['identical']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Cold-start benchmark for the renderer.
+
+Each scenario runs in a fresh interpreter and reports wall time and peak RSS:
+  import        - import poster_generator (spaCy is no longer loaded at import)
+  full model    - import + spacy.load of the whole en_core_web_sm pipeline,
+                  which is what importing poster_generator used to cost
+  trimmed model - import + the NER-only pipeline event_extractor now loads lazily
+
+Run from the repository root:
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+PRELUDE = f"""
+import resource, sys, time
+sys.path.insert(0, {str(SRC_DIR)!r})
+start = time.perf_counter()
+"""
+
+EPILOGUE = """
+elapsed = time.perf_counter() - start
+# ru_maxrss is in KiB on Linux
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+
+SCENARIOS = {
+    "import": "import poster_generator",
+    "full model": (
+        "import poster_generator, event_extractor, spacy\n"
+        "spacy.load(event_extractor.MODEL_NAME)"
+    ),
+    "trimmed model": (
+        "import poster_generator, event_extractor\n"
+        "event_extractor.get_nlp()"
+    ),
+}
+
+def run_scenario(code):
+    out = subprocess.run(
+        [sys.executable, "-c", PRELUDE + code + EPILOGUE],
+        check=True, capture_output=True, text=True
+    ).stdout.split()
+    return float(out[-2]), float(out[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", metavar="FILE", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'scenario':<15} {'seconds':>9} {'peak RSS MB':>12}")
+    for name, code in SCENARIOS.items():
+        runs = [run_scenario(code) for _ in range(args.repeat)]
+        seconds = statistics.median(r[0] for r in runs)
+        rss_mb = statistics.median(r[1] for r in runs)
+        results[name] = {"seconds": seconds, "peak_rss_mb": rss_mb}
+        print(f"{name:<15} {seconds:>9.3f} {rss_mb:>12.1f}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Load test for the HTTP poster service (src/server.py).
+
+Starts a server on a free localhost port (or targets --url), then sends
+--requests POST /render calls from --concurrency client threads, each on its
+own keep-alive connection. Bodies come from the render benchmark's corpus;
+--distinct limits how many different texts are used, so lower values exercise
+request coalescing. Reports requests/sec, p50/p95/p99 latency, status codes and
+the server's own /healthz counters:
+    python benchmarks/load_test.py --requests 500 --concurrency 16 --extractor rules
+"""
+import argparse
+import http.client
+import json
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_render import make_corpus, percentile
+
+def start_server(args):
+    command = [
+        sys.executable, str(ROOT / "src" / "server.py"), "--port", "0",
+        "--extractor", args.extractor, "--max-pending", str(args.max_pending),
+    ]
+    if args.workers:
+        command += ["--workers", str(args.workers)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("Serving posters on "):
+        process.kill()
+        raise SystemExit(f"server failed to start: {line!r}")
+    return process, line.split()[3]
+
+def get_json(url, path):
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    try:
+        connection.request("GET", path)
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+def client(url, bodies, latencies, statuses, lock):
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=120)
+    for body in bodies:
+        start = time.perf_counter()
+        try:
+            connection.request("POST", "/render", body=body, headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=120)
+            status = "error"
+        elapsed = time.perf_counter() - start
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(elapsed)
+    connection.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Existing server to test instead of starting one")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--distinct", type=int, default=None, help="Different texts to cycle through (default: all unique)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--format", default="png", choices=["png", "webp", "jpeg"])
+    parser.add_argument("--workers", type=int, default=None, help="Server worker processes")
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--extractor", default="spacy", choices=["spacy", "rules", "hybrid"])
+    parser.add_argument("--json", metavar="FILE", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.distinct or args.requests, args.seed)
+    bodies = [
+        json.dumps({"text": corpus[i % len(corpus)], "seed": i % len(corpus), "format": args.format}).encode()
+        for i in range(args.requests)
+    ]
+
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_server(args)
+    try:
+        latencies, statuses, lock = [], {}, threading.Lock()
+        threads = [
+            threading.Thread(target=client, args=(url, bodies[i::args.concurrency], latencies, statuses, lock))
+            for i in range(args.concurrency)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+        health = get_json(url, "/healthz")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    results = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "distinct": len(corpus),
+        "wall_s": wall,
+        "requests_per_s": args.requests / wall,
+        "statuses": {str(status): count for status, count in statuses.items()},
+        "server": health,
+    }
+    if latencies:
+        results["latency_ms"] = {
+            "mean": statistics.mean(latencies) * 1000,
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+        }
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {len(corpus)} distinct texts")
+    print(f"{results['requests_per_s']:.1f} req/s over {wall:.2f}s, statuses {results['statuses']}")
+    if latencies:
+        latency = results["latency_ms"]
+        print(f"latency p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms, p99 {latency['p99']:.1f} ms")
+    print(f"server: {health['renders']} renders, {health['coalesced']} coalesced, {health['rejected']} rejected")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
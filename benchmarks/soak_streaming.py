@@ -0,0 +1,104 @@
+"""
+Soak test for the streaming batch mode (src/streaming.py).
+
+Streams --count generated events through stream_posters and samples the
+process's resident memory every --every posters. Every event name carries a
+serial number, so the spaCy vocab sees a new word per poster, as it would on a
+real event dump. Encoded posters are discarded unless --out-dir is given.
+After --warmup posters (the caches have filled by then), RSS should stay flat.
+The run fails when it grows by more than --max-growth MB:
+    python benchmarks/soak_streaming.py --count 100000 --extractor rules --json soak.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_render import DATES, LOCATIONS, NAME_WORDS
+from streaming import stream_posters
+
+def events(count, seed):
+    rng = random.Random(seed)
+    for i in range(count):
+        name = " ".join(rng.choice(NAME_WORDS) for _ in range(rng.randint(1, 5)))
+        yield f"{name} Vol{i} on {rng.choice(DATES)} in {rng.choice(LOCATIONS)}"
+
+def rss_mb() -> float:
+    """Current resident set size; peak RSS where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+class NullSink:
+    def __init__(self):
+        self.bytes = 0
+
+    def __call__(self, index, text, data):
+        self.bytes += len(data)
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--every", type=int, default=5000, help="Posters between RSS samples")
+    parser.add_argument("--warmup", type=int, default=5000, help="Posters before the RSS baseline is taken")
+    parser.add_argument("--max-growth", type=float, default=32, help="Allowed RSS growth after warm-up, in MB")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--extractor", default="spacy", choices=["spacy", "rules", "hybrid"])
+    parser.add_argument("--format", default="png", choices=["png", "webp", "jpeg"])
+    parser.add_argument("--out-dir", help="Write the posters here instead of discarding them")
+    parser.add_argument("--json", metavar="FILE", help="Write the samples as JSON")
+    args = parser.parse_args()
+
+    sink = args.out_dir or NullSink()
+    results = stream_posters(
+        events(args.count, args.seed), sink,
+        extractor=args.extractor, seed=args.seed, fmt=args.format,
+        encode_options={"compress_level": 1} if args.format == "png" else None
+    )
+
+    samples = [{"posters": 0, "rss_mb": rss_mb(), "elapsed_s": 0.0}]
+    failed = 0
+    start = time.perf_counter()
+    print(f"{'posters':>8} {'RSS MB':>8} {'posters/s':>10}")
+    for done, result in enumerate(results, 1):
+        if result.error:
+            failed += 1
+        if done % args.every == 0 or done == args.count:
+            elapsed = time.perf_counter() - start
+            samples.append({"posters": done, "rss_mb": rss_mb(), "elapsed_s": elapsed})
+            print(f"{done:>8} {samples[-1]['rss_mb']:>8.1f} {done / elapsed:>10.1f}", flush=True)
+
+    after_warmup = [s for s in samples if s["posters"] >= args.warmup] or samples[-1:]
+    baseline = after_warmup[0]["rss_mb"]
+    growth = max(s["rss_mb"] for s in after_warmup) - baseline
+    print(f"{failed} failed; RSS {baseline:.1f} MB after {after_warmup[0]['posters']} posters, "
+          f"at most {growth:+.1f} MB after that (limit {args.max_growth} MB)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "count": args.count,
+                "extractor": args.extractor,
+                "format": args.format,
+                "failed": failed,
+                "baseline_rss_mb": baseline,
+                "growth_mb": growth,
+                "samples": samples,
+            }, f, indent=2)
+    if growth > args.max_growth:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
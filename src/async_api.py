@@ -0,0 +1,204 @@
+import asyncio
+import os
+import random
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+from batch import PosterResult, _extract_chunk, _extraction_failed
+from encoders import encode_image, extension_for, format_for_path, save_encoded
+from event_extractor import extract_event_info
+from extractors import get_extractor
+from output_store import derive_seed
+from poster_generator import render_poster
+import tracing
+
+# Default size of the render pool; drawing, rotating, pasting and encoding spend
+# most of their time in Pillow's C code with the GIL released
+RENDER_THREADS = min(8, os.cpu_count() or 1)
+
+_render_executor = None
+_ner_executor = None
+
+def get_render_executor() -> Executor:
+    """The pool posters are rendered, encoded and written on, created on first use."""
+    global _render_executor
+    if _render_executor is None:
+        _render_executor = ThreadPoolExecutor(RENDER_THREADS, thread_name_prefix="poster-render")
+    return _render_executor
+
+def get_ner_executor() -> Executor:
+    """
+    The executor extraction runs on: a single thread, so the spaCy pipeline and the
+    extraction cache are only ever used from one thread.
+    """
+    global _ner_executor
+    if _ner_executor is None:
+        _ner_executor = ThreadPoolExecutor(1, thread_name_prefix="poster-ner")
+    return _ner_executor
+
+def set_executors(render: Optional[Executor] = None, ner: Optional[Executor] = None):
+    """
+    Replaces the render and/or NER executor, e.g. with a bigger thread pool or a
+    ProcessPoolExecutor for the render stage. Replaced executors are not shut down.
+    """
+    global _render_executor, _ner_executor
+    if render is not None:
+        _render_executor = render
+    if ner is not None:
+        _ner_executor = ner
+
+def shutdown(wait: bool = True):
+    """Shuts down the current executors; the next call creates default ones."""
+    global _render_executor, _ner_executor
+    for executor in (_render_executor, _ner_executor):
+        if executor is not None:
+            executor.shutdown(wait=wait)
+    _render_executor = _ner_executor = None
+
+def render_encoded(
+    event_info: dict,
+    font_path=None,
+    seed: Optional[int] = None,
+    fmt: str = "png",
+    encode_options: Optional[dict] = None,
+    target_size: Optional[Tuple[int, int]] = None,
+    palette=None,
+    layout_candidates: int = 1
+) -> bytes:
+    """
+    Renders and encodes one poster; the render stage of agenerate_poster.
+    A plain module-level function, so process pools can run it too.
+    """
+    rng = random.Random(seed) if seed is not None else None
+    img = render_poster(event_info, font_path, rng=rng, layout_candidates=layout_candidates,
+                        target_size=target_size, palette=palette)
+    try:
+        with tracing.span("encode"):
+            return encode_image(img, fmt, **(encode_options or {}))
+    finally:
+        img.close()
+
+async def _stage(executor: Executor, deadline: Optional[float], fn, *args):
+    """Runs fn(*args) on executor, giving up at deadline (event loop time)."""
+    loop = asyncio.get_running_loop()
+    if deadline is None:
+        return await loop.run_in_executor(executor, fn, *args)
+    remaining = deadline - loop.time()
+    if remaining <= 0:
+        raise asyncio.TimeoutError()
+    return await asyncio.wait_for(loop.run_in_executor(executor, fn, *args), remaining)
+
+async def agenerate_poster(
+    text,
+    output_path=None,
+    font_path=None,
+    event_info=None,
+    extractor=None,
+    seed=None,
+    fmt=None,
+    encode_options=None,
+    target_size=None,
+    palette=None,
+    layout_candidates=1,
+    timeout: Optional[float] = None
+) -> bytes:
+    """
+    generate_poster for asyncio code: returns the encoded poster, and also writes it
+    to output_path if one is given, without blocking the event loop.
+    Extraction runs on the NER executor; rendering, encoding and writing on the
+    render pool (see set_executors). The other arguments are as for generate_poster.
+    timeout (seconds) covers all stages together and raises asyncio.TimeoutError.
+    A timed-out or cancelled call starts no further stages; a stage already running
+    on a thread finishes there and its result is dropped.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout is not None else None
+    fmt = fmt or (format_for_path(output_path) if output_path else "png")
+    with tracing.span("poster"):
+        if event_info is None:
+            extract = extractor.extract if extractor else extract_event_info
+            with tracing.span("extract"):
+                event_info = await _stage(get_ner_executor(), deadline, extract, text)
+        data = await _stage(
+            get_render_executor(), deadline, render_encoded,
+            event_info, font_path, seed, fmt, encode_options, target_size, palette, layout_candidates
+        )
+        if output_path is not None:
+            await _stage(get_render_executor(), deadline, save_encoded, data, output_path)
+    return data
+
+async def agenerate_posters(
+    texts: Iterable[str],
+    out_dir,
+    font_path: Optional[str] = None,
+    extractor: str = "spacy",
+    seed: Optional[int] = None,
+    fmt: str = "png",
+    encode_options: Optional[dict] = None,
+    target_size: Optional[Tuple[int, int]] = None,
+    layout_candidates: int = 1,
+    timeout: Optional[float] = None,
+    batch_size: int = 32,
+    max_pending: Optional[int] = None
+) -> List[PosterResult]:
+    """
+    generate_posters for asyncio code: one poster per text in out_dir, with results
+    in input order and failures reported per item.
+    Texts are extracted batch_size at a time on the NER executor while earlier
+    batches render; at most max_pending posters (default: twice RENDER_THREADS) are
+    rendering or waiting for the render pool at once. timeout applies to each
+    poster's render and write. Cancelling the call cancels every poster not yet done.
+    """
+    out_dir = str(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    backend = get_extractor(extractor)
+    await _stage(get_ner_executor(), None, backend.warm_up)
+    pending = asyncio.Semaphore(max_pending or 2 * RENDER_THREADS)
+
+    async def render_one(index: int, text: str, info) -> PosterResult:
+        if isinstance(info, Exception):
+            return _extraction_failed(index, text, info)
+        output_path = os.path.join(out_dir, f"poster-{index:06d}{extension_for(fmt)}")
+        async with pending:
+            try:
+                await agenerate_poster(
+                    text, output_path, font_path,
+                    event_info=info,
+                    seed=derive_seed(seed, text) if seed is not None else None,
+                    fmt=fmt,
+                    encode_options=encode_options,
+                    target_size=target_size,
+                    layout_candidates=layout_candidates,
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                return PosterResult(index, text, None, f"timed out after {timeout}s")
+            except Exception as e:
+                return PosterResult(index, text, None, f"render failed: {e}")
+        return PosterResult(index, text, output_path, None)
+
+    tasks = []
+    try:
+        chunk = []
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) < batch_size:
+                continue
+            tasks.extend(await _schedule(chunk, len(tasks), backend, render_one))
+            chunk = []
+        if chunk:
+            tasks.extend(await _schedule(chunk, len(tasks), backend, render_one))
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+async def _schedule(chunk: List[str], first_index: int, backend, render_one) -> list:
+    """Extracts a chunk on the NER executor and starts rendering each of its posters."""
+    with tracing.span("extract"):
+        infos = await _stage(get_ner_executor(), None, _extract_chunk, chunk, len(chunk), backend)
+    return [
+        asyncio.ensure_future(render_one(first_index + i, text, info))
+        for i, (text, info) in enumerate(zip(chunk, infos))
+    ]
@@ -0,0 +1,300 @@
+import csv
+import json
+import os
+import multiprocessing
+import random
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from encoders import AsyncWriter, encode_image, extension_for, format_id, save_image
+from event_extractor import configure_cache
+from extractors import get_extractor
+import tracing
+from output_store import OutputStore, derive_seed, poster_key
+from poster_generator import HEIGHT, WIDTH, render_poster
+from typography import resolve_font_path
+
+class PosterResult(NamedTuple):
+    index: int
+    text: Optional[str]             # None for a record read_events could not read
+    output_path: Optional[str]
+    error: Optional[str]
+
+class BadRecord(ValueError):
+    """Yielded by read_events in place of a record it could not read, so only that item fails."""
+
+def read_events(path) -> Iterator[str]:
+    """
+    Yields event descriptions from a file.
+    .jsonl files hold one JSON object with a "text" field (or a bare string) per line,
+    .csv files need a "text" column, anything else is read as one event per line.
+    A record that is not valid JSON or has no text yields a BadRecord instead.
+    """
+    suffix = Path(path).suffix.lower()
+    with open(path, newline="", encoding="utf-8") as f:
+        if suffix == ".jsonl":
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield BadRecord(f"line {number}: {e}")
+                    continue
+                if not isinstance(record, dict):
+                    yield str(record)
+                elif isinstance(record.get("text"), str):
+                    yield record["text"]
+                else:
+                    yield BadRecord(f"line {number}: no \"text\" string")
+        elif suffix == ".csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                text = row.get("text")
+                yield text if text is not None else BadRecord(f"line {reader.line_num}: no \"text\" column")
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line
+
+def _chunked(items: Iterable, size: int) -> Iterator[list]:
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+# Per-process settings, filled in by _init_worker
+_worker_font_path = None
+_worker_extractor = None
+_worker_seed = None
+_worker_store = None
+_worker_format = "png"
+_worker_encode_options = {}
+_worker_writer = None
+_worker_target_size = (WIDTH, HEIGHT)
+_worker_layout_candidates = 1
+
+def _init_worker(
+    font_path: Optional[str],
+    extractor: str = "spacy",
+    extraction_cache: Optional[str] = None,
+    trace: bool = False,
+    seed: Optional[int] = None,
+    store: Optional[str] = None,
+    fmt: str = "png",
+    encode_options: Optional[dict] = None,
+    target_size: Optional[Tuple[int, int]] = None,
+    layout_candidates: int = 1
+):
+    """Runs once in every worker process before it takes any work."""
+    global _worker_font_path, _worker_extractor, _worker_seed, _worker_store
+    global _worker_format, _worker_encode_options, _worker_writer, _worker_target_size
+    global _worker_layout_candidates
+    _worker_font_path = font_path if font_path is not None else str(resolve_font_path("regular"))
+    _worker_seed = seed
+    _worker_store = OutputStore(store) if store and seed is not None else None
+    _worker_format = fmt
+    _worker_encode_options = encode_options or {}
+    _worker_target_size = tuple(target_size or (WIDTH, HEIGHT))
+    _worker_layout_candidates = layout_candidates
+    # Encoding and writing overlap with rendering the next poster of the chunk
+    if _worker_writer is None:
+        _worker_writer = AsyncWriter()
+    if extraction_cache:
+        configure_cache(path=extraction_cache)
+    if trace:
+        tracing.set_tracer(tracing.MetricsTracer())
+    _worker_extractor = get_extractor(extractor)
+    # No-op when the pool forked after the parent loaded the model
+    _worker_extractor.warm_up()
+
+def worker_ready() -> int:
+    """Trivial task used to make sure a pool's workers have started and run _init_worker."""
+    return os.getpid()
+
+def render_poster_bytes(text: str, seed: Optional[int] = None, fmt: str = "png",
+                        encode_options: Optional[dict] = None,
+                        target_size: Optional[Tuple[int, int]] = None,
+                        layout_candidates: Optional[int] = None) -> bytes:
+    """Extracts, renders and encodes one poster in a process set up by _init_worker."""
+    info = _worker_extractor.extract(text)
+    rng = random.Random(seed) if seed is not None else None
+    img = render_poster(info, _worker_font_path, rng=rng,
+                        layout_candidates=layout_candidates or _worker_layout_candidates,
+                        target_size=target_size or _worker_target_size)
+    return encode_image(img, fmt, **(encode_options or {}))
+
+def _extract_chunk(texts: List[str], batch_size: int, extractor=None) -> list:
+    """
+    Extract a chunk in one batch; fall back to one-by-one so a bad item only fails itself.
+    BadRecords are passed through as their own result. extractor defaults to this worker's.
+    """
+    extractor = extractor or _worker_extractor
+    good = [text for text in texts if not isinstance(text, BadRecord)]
+    try:
+        extracted = list(extractor.extract_many(good, batch_size=batch_size))
+    except Exception:
+        extracted = []
+        for text in good:
+            try:
+                extracted.append(extractor.extract(text))
+            except Exception as e:
+                extracted.append(e)
+    extracted = iter(extracted)
+    return [text if isinstance(text, BadRecord) else next(extracted) for text in texts]
+
+def _extraction_failed(index: int, text, error: Exception) -> PosterResult:
+    """The result for an item _extract_chunk returned an error for."""
+    if isinstance(error, BadRecord):
+        return PosterResult(index, None, None, f"bad record: {error}")
+    return PosterResult(index, text, None, f"extraction failed: {error}")
+
+def _write_poster(img, output_path: str, key: Optional[str]):
+    """Runs on the worker's writer thread."""
+    with tracing.span("encode"):
+        save = partial(save_image, img, fmt=_worker_format, **_worker_encode_options)
+        if key is not None:
+            _worker_store.export(_worker_store.put(key, save, extension_for(_worker_format)), output_path)
+        else:
+            save(output_path)
+
+def _render_chunk(chunk: List[Tuple[int, str]], out_dir: str) -> Tuple[List[PosterResult], Optional[dict]]:
+    """Returns the chunk's results plus, when tracing, the metrics recorded for it."""
+    results = {}
+    pending = []
+    for index, text in chunk:
+        if isinstance(text, BadRecord):
+            results[index] = _extraction_failed(index, text, text)
+            continue
+        output_path = os.path.join(out_dir, f"poster-{index:06d}{extension_for(_worker_format)}")
+        seed = derive_seed(_worker_seed, text) if _worker_seed is not None else None
+        key = None
+        if _worker_store is not None:
+            key = poster_key(
+                text, seed, _worker_font_path,
+                canvas_size=_worker_target_size,
+                extractor=_worker_extractor.name,
+                fmt=format_id(_worker_format, **_worker_encode_options),
+                layout_candidates=_worker_layout_candidates
+            )
+            # Posters already in the store skip extraction and rendering entirely
+            stored = _worker_store.get(key, extension_for(_worker_format))
+            if stored is not None:
+                tracing.count("store.hit")
+                try:
+                    _worker_store.export(stored, output_path)
+                except Exception as e:
+                    results[index] = PosterResult(index, text, None, f"export failed: {e}")
+                else:
+                    results[index] = PosterResult(index, text, output_path, None)
+                continue
+            tracing.count("store.miss")
+        pending.append((index, text, output_path, seed, key))
+
+    if pending:
+        with tracing.span("extract"):
+            infos = _extract_chunk([text for _, text, _, _, _ in pending], batch_size=len(pending))
+    else:
+        infos = []
+
+    writes = []
+    for (index, text, output_path, seed, key), info in zip(pending, infos):
+        if isinstance(info, Exception):
+            results[index] = _extraction_failed(index, text, info)
+            continue
+        try:
+            with tracing.span("poster"):
+                rng = random.Random(seed) if seed is not None else None
+                img = render_poster(info, _worker_font_path, rng=rng,
+                                    layout_candidates=_worker_layout_candidates, target_size=_worker_target_size)
+        except Exception as e:
+            results[index] = PosterResult(index, text, None, f"render failed: {e}")
+        else:
+            writes.append((index, text, output_path, _worker_writer.submit(_write_poster, img, output_path, key)))
+
+    for index, text, output_path, write in writes:
+        try:
+            write.result()
+        except Exception as e:
+            results[index] = PosterResult(index, text, None, f"write failed: {e}")
+        else:
+            results[index] = PosterResult(index, text, output_path, None)
+    results = [results[index] for index, _ in chunk]
+
+    tracer = tracing.get_tracer()
+    if not tracer.enabled:
+        return results, None
+    snapshot = tracer.snapshot()
+    tracer.reset()
+    return results, snapshot
+
+def generate_posters(
+    texts: Iterable[str],
+    out_dir,
+    workers: Optional[int] = None,
+    chunk_size: int = 32,
+    font_path: Optional[str] = None,
+    extractor: str = "spacy",
+    extraction_cache: Optional[str] = None,
+    tracer: Optional[tracing.MetricsTracer] = None,
+    seed: Optional[int] = None,
+    store: Optional[str] = None,
+    fmt: str = "png",
+    encode_options: Optional[dict] = None,
+    target_size: Optional[Tuple[int, int]] = None,
+    layout_candidates: int = 1
+) -> Iterator[PosterResult]:
+    """
+    Render one poster per text into out_dir, spreading the work over a process pool.
+
+    Texts are handed out in chunks of chunk_size; each chunk is extracted in one
+    batch by the named extractor backend and rendered in the same worker. Results stream back in
+    input order, with failures reported per item instead of aborting the batch.
+    workers=1 runs everything in the current process; None uses all CPUs.
+    extraction_cache is an SQLite file all workers share for extraction results.
+    Metrics the workers record are merged into tracer, if one is given.
+    With a seed every poster is reproducible: its own seed is derived from the
+    batch seed and its text. store is then a directory of posters kept by content
+    key (see output_store), so unchanged inputs are copied instead of re-rendered.
+    fmt and encode_options pick the output format and its settings (see encoders.save_options);
+    each worker encodes and writes on a background thread while it renders the next poster.
+    target_size renders every poster at that resolution instead of the design size,
+    and layout_candidates > 1 draws the best of that many planned layouts for each.
+    """
+    out_dir = str(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    chunks = _chunked(enumerate(texts), chunk_size)
+    render_chunk = partial(_render_chunk, out_dir=out_dir)
+
+    # Load the model once up front; forked workers inherit it already warm
+    # instead of each paying spacy.load
+    get_extractor(extractor).warm_up()
+
+    def collect(results, snapshot):
+        if snapshot is not None and tracer is not None:
+            tracer.merge(snapshot)
+        return results
+
+    init_args = (
+        font_path, extractor, extraction_cache, tracer is not None,
+        seed, store and str(store), fmt, encode_options, target_size, layout_candidates
+    )
+    if workers == 1:
+        previous_tracer = tracing.get_tracer()
+        _init_worker(*init_args)
+        try:
+            for chunk in chunks:
+                yield from collect(*render_chunk(chunk))
+        finally:
+            tracing.set_tracer(previous_tracer)
+        return
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=init_args) as pool:
+        for results, snapshot in pool.imap(render_chunk, chunks):
+            yield from collect(results, snapshot)
@@ -0,0 +1,147 @@
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+from PIL import Image
+
+# Pillow format name and file extension for each output format
+FORMATS = {
+    "png": ("PNG", ".png"),
+    "webp": ("WEBP", ".webp"),
+    "jpeg": ("JPEG", ".jpg"),
+}
+
+def _check_format(fmt: str) -> str:
+    fmt = fmt.lower()
+    if fmt == "jpg":
+        fmt = "jpeg"
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format '{fmt}', expected one of {sorted(FORMATS)}")
+    return fmt
+
+def format_for_path(path) -> str:
+    """Output format implied by a file name; anything unknown is written as PNG."""
+    suffix = Path(path).suffix.lower()
+    for fmt, (_, extension) in FORMATS.items():
+        if suffix == extension or (fmt == "jpeg" and suffix == ".jpeg"):
+            return fmt
+    return "png"
+
+def extension_for(fmt: str) -> str:
+    return FORMATS[_check_format(fmt)][1]
+
+def save_options(
+    fmt: str = "png",
+    compress_level: Optional[int] = None,
+    quality: Optional[int] = None,
+    optimize: bool = False,
+    lossless: bool = False
+) -> dict:
+    """
+    Keyword arguments for Image.save.
+    PNG: compress_level 0-9 (Pillow's default is 6; 1 is several times faster on flat posters).
+    optimize=True trades a lot of encode time for a few percent of size and is off by default.
+    WebP/JPEG: quality 1-100 (default 90). lossless=True makes WebP lossless.
+    """
+    fmt = _check_format(fmt)
+    if fmt == "png":
+        options = {"optimize": optimize}
+        if compress_level is not None:
+            options["compress_level"] = compress_level
+        return options
+    if fmt == "webp":
+        if lossless:
+            return {"lossless": True, "quality": 100 if quality is None else quality, "method": 0}
+        # method 4 is Pillow's default speed/size tradeoff
+        return {"quality": 90 if quality is None else quality, "method": 4}
+    return {"quality": 90 if quality is None else quality, "optimize": optimize}
+
+def format_id(fmt: str = "png", **options) -> str:
+    """Short stable name for a format plus its options, e.g. for cache keys."""
+    fmt = _check_format(fmt)
+    settings = save_options(fmt, **options)
+    return fmt + "".join(f";{name}={value}" for name, value in sorted(settings.items()))
+
+def _prepare(img: Image.Image, fmt: str) -> Image.Image:
+    # JPEG has no alpha channel
+    if fmt == "jpeg" and img.mode not in ("RGB", "L"):
+        return img.convert("RGB")
+    return img
+
+def encode_to_buffer(img: Image.Image, fmt: str = "png", **options) -> io.BytesIO:
+    """Encodes img in memory and returns the buffer rewound to the start."""
+    fmt = _check_format(fmt)
+    buffer = io.BytesIO()
+    _prepare(img, fmt).save(buffer, format=FORMATS[fmt][0], **save_options(fmt, **options))
+    buffer.seek(0)
+    return buffer
+
+def encode_image(img: Image.Image, fmt: str = "png", **options) -> bytes:
+    """Encoded image bytes, e.g. for an HTTP response; nothing touches disk."""
+    return encode_to_buffer(img, fmt, **options).getvalue()
+
+def _write_atomic(path, write):
+    """Calls write(file) on a temp file next to path, then renames it over path."""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def save_image(img: Image.Image, path, fmt: Optional[str] = None, **options):
+    """
+    Writes img to path; fmt defaults to the format implied by the file name.
+    The file is written under a temp name and renamed, so readers never see half a
+    poster and an existing file (possibly a hard link into an output store) is replaced, not rewritten.
+    """
+    fmt = _check_format(fmt) if fmt else format_for_path(path)
+    _write_atomic(path, lambda f: _prepare(img, fmt).save(f, format=FORMATS[fmt][0], **save_options(fmt, **options)))
+
+def save_encoded(data: bytes, path):
+    """Writes already encoded image bytes to path, replacing it atomically like save_image."""
+    _write_atomic(path, lambda f: f.write(data))
+
+class AsyncWriter:
+    """
+    Encodes and writes images on a background thread so the next poster can be
+    rendered meanwhile; zlib and libwebp release the GIL while they work.
+    At most max_pending writes are queued, which bounds the memory held by
+    rendered-but-unwritten images; submit() blocks once that many are in flight.
+    """
+
+    def __init__(self, max_pending: int = 4, threads: int = 1):
+        self._executor = ThreadPoolExecutor(threads, thread_name_prefix="poster-writer")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Runs fn(*args, **kwargs) on the writer thread; the future carries its result or error."""
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def write(self, img: Image.Image, path, fmt: Optional[str] = None, **options) -> Future:
+        return self.submit(save_image, img, path, fmt, **options)
+
+    def close(self):
+        """Waits for every queued write to finish."""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -1,25 +1,152 @@
-import spacy
 import re
+from contextlib import nullcontext
+from itertools import islice
+from extraction_cache import ExtractionCache, cache_key
+import tracing
 
-nlp = spacy.load("en_core_web_sm")
+MODEL_NAME = "en_core_web_sm"
 
-def extract_event_info(text):
-    doc = nlp(text)
+# Pipeline components extract_event_info never reads; it only needs doc.ents from NER
+UNUSED_PIPES = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter"]
 
+_nlp = None
+_model_id = None
+_cache = ExtractionCache()
+
+def load_nlp(model_name=MODEL_NAME):
+    """
+    Loads a spaCy pipeline trimmed down to what extract_event_info needs.
+    """
+    import spacy  # Imported here so importing this module stays cheap
+
+    nlp = spacy.load(model_name, exclude=UNUSED_PIPES)
+    # The small English models give NER its own tok2vec, so the shared one is dead weight
+    if "tok2vec" in nlp.pipe_names and not nlp.get_pipe("tok2vec").listening_components:
+        nlp.remove_pipe("tok2vec")
+    return nlp
+
+def get_nlp():
+    """
+    Returns the shared pipeline, loading it on first use.
+    """
+    global _nlp
+    if _nlp is None:
+        _nlp = load_nlp()
+    return _nlp
+
+def set_nlp(nlp):
+    """
+    Replaces the shared pipeline, e.g. with a model the caller already loaded.
+    """
+    global _nlp, _model_id
+    _nlp = nlp
+    _model_id = None
+
+def model_id(nlp=None):
+    """
+    Identifies the model (and spaCy version) behind extraction results, for cache keys.
+    For the default installed model this reads package metadata instead of loading it.
+    """
+    global _model_id
+    import spacy
+
+    if nlp is not None:
+        meta = nlp.meta
+        return f"{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}/spacy-{spacy.__version__}"
+    if _model_id is None:
+        version = None if _nlp is not None else spacy.util.get_package_version(MODEL_NAME)
+        if version is not None:
+            _model_id = f"{MODEL_NAME}-{version}/spacy-{spacy.__version__}"
+        else:
+            _model_id = model_id(get_nlp())
+    return _model_id
+
+def configure_cache(maxsize=10000, path=None):
+    """
+    Replaces the extraction cache. path adds an SQLite tier that worker processes can share.
+    """
+    global _cache
+    _cache = ExtractionCache(maxsize=maxsize, path=path)
+
+def cache_stats():
+    return _cache.stats()
+
+def __getattr__(name):
+    # Keeps `event_extractor.nlp` working now that the model loads lazily
+    if name == "nlp":
+        return get_nlp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def memory_zone(nlp):
+    """
+    nlp.memory_zone() on spaCy 3.8+: strings and lexemes first seen inside it are
+    dropped from the vocab on exit, so the StringStore doesn't grow with every new
+    word over a long run. Docs made inside must not be used after it closes.
+    """
+    zone = getattr(nlp, "memory_zone", None)
+    return zone() if zone is not None else nullcontext()
+
+def extract_event_info(text, nlp=None):
+    model = model_id(nlp)
+    key = cache_key(text, model)
+    info = _cache.get(key, model)
+    if info is None:
+        tracing.count("extract.cache_miss")
+        nlp = nlp or get_nlp()
+        with tracing.span("extract.ner"), memory_zone(nlp):
+            doc = nlp(text)
+            info = event_info_from_doc(text, doc)
+        _cache.put(key, model, info)
+    else:
+        tracing.count("extract.cache_hit")
+    return dict(info)
+
+def extract_event_infos(texts, batch_size=64, nlp=None):
+    """
+    Yields extract_event_info() results for many texts, in input order.
+    Cache misses are run through nlp.pipe so spaCy can batch the inference.
+    """
+    model = model_id(nlp)
+    texts = iter(texts)
+    while True:
+        chunk = list(islice(texts, batch_size))
+        if not chunk:
+            return
+        keys = [cache_key(text, model) for text in chunk]
+        infos = [_cache.get(key, model) for key in keys]
+        misses = [i for i, info in enumerate(infos) if info is None]
+        tracing.count("extract.cache_hit", len(chunk) - len(misses))
+        tracing.count("extract.cache_miss", len(misses))
+        if misses:
+            pipeline = nlp or get_nlp()
+            with tracing.span("extract.ner"), memory_zone(pipeline):
+                docs = pipeline.pipe([chunk[i] for i in misses], batch_size=batch_size)
+                for i, doc in zip(misses, docs):
+                    infos[i] = event_info_from_doc(chunk[i], doc)
+                    _cache.put(keys[i], model, infos[i])
+        for info in infos:
+            yield dict(info)
+
+def event_info_from_doc(text, doc):
     # Hold detected values
     date_span = None
     location_span = None
 
-    # Collect spans for removal
-    spans_to_remove = []
-
     for ent in doc.ents:
         if ent.label_ == "DATE" and date_span is None:
             date_span = ent
-            spans_to_remove.append(ent)
         elif ent.label_ in {"GPE", "LOC"} and location_span is None:
             location_span = ent
-            spans_to_remove.append(ent)
+
+    return event_info_from_spans(text, date_span, location_span)
+
+def event_info_from_spans(text, date_span, location_span):
+    """
+    Builds the event info dict from the detected date and location spans.
+    Spans only need start_char, end_char and text, so spaCy entities and rule matches both work.
+    """
+    # Collect spans for removal
+    spans_to_remove = [span for span in (date_span, location_span) if span is not None]
 
     # Sort spans in reverse so we can safely slice the string
     spans_to_remove = sorted(spans_to_remove, key=lambda ent: ent.start_char, reverse=True)
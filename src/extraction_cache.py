@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+def normalize_text(text: str) -> str:
+    """NFC-normalizes text and collapses whitespace, so trivially different inputs share a key."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+def cache_key(text: str, model_id: str) -> str:
+    return hashlib.sha256(f"{model_id}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+class ExtractionCache:
+    """
+    Cache of extract_event_info results keyed by cache_key().
+
+    An in-memory LRU sits in front of an optional SQLite file. The file can be shared
+    by several worker processes; each process opens its own connection. Rows written
+    by a different model are dropped the first time a process uses the file, so a
+    model upgrade invalidates the disk tier.
+    """
+
+    def __init__(self, maxsize: int = 10000, path=None):
+        self.maxsize = maxsize
+        self.path = str(path) if path else None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+        self._validated_models = set()
+
+    def _connection(self, model_id: str):
+        if self.path is None:
+            return None
+        # A connection inherited through fork must not be reused
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS extractions "
+                "(key TEXT PRIMARY KEY, model TEXT NOT NULL, info TEXT NOT NULL)"
+            )
+            self._db_pid = os.getpid()
+            self._validated_models = set()
+        if model_id not in self._validated_models:
+            with self._db:
+                self._db.execute("DELETE FROM extractions WHERE model != ?", (model_id,))
+            self._validated_models.add(model_id)
+        return self._db
+
+    def _remember(self, key: str, info: dict):
+        self._memory[key] = info
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str, model_id: str) -> Optional[dict]:
+        with self._lock:
+            info = self._memory.get(key)
+            if info is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return info
+
+            db = self._connection(model_id)
+            if db is not None:
+                row = db.execute("SELECT info FROM extractions WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    info = json.loads(row[0])
+                    self._remember(key, info)
+                    self.disk_hits += 1
+                    return info
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, model_id: str, info: dict):
+        with self._lock:
+            self._remember(key, info)
+            db = self._connection(model_id)
+            if db is not None:
+                with db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO extractions (key, model, info) VALUES (?, ?, ?)",
+                        (key, model_id, json.dumps(info))
+                    )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self._memory),
+            }
@@ -0,0 +1,104 @@
+from itertools import islice
+from typing import Iterable, Iterator
+
+import event_extractor
+import rule_extractor
+import tracing
+
+class SpacyExtractor:
+    """Full NER extraction through event_extractor (cached, batched with nlp.pipe)."""
+    name = "spacy"
+
+    def __init__(self, nlp=None):
+        self.nlp = nlp
+
+    def warm_up(self):
+        if self.nlp is None:
+            event_extractor.get_nlp()
+
+    def extract(self, text: str) -> dict:
+        return event_extractor.extract_event_info(text, nlp=self.nlp)
+
+    def extract_many(self, texts: Iterable[str], batch_size: int = 64) -> Iterator[dict]:
+        return event_extractor.extract_event_infos(texts, batch_size=batch_size, nlp=self.nlp)
+
+class RuleExtractor:
+    """Precompiled date patterns plus a place gazetteer; no model needed."""
+    name = "rules"
+
+    def warm_up(self):
+        pass
+
+    def extract(self, text: str) -> dict:
+        return rule_extractor.extract_event_info(text)
+
+    def extract_with_confidence(self, text: str):
+        return rule_extractor.extract_with_confidence(text)
+
+    def extract_many(self, texts: Iterable[str], batch_size: int = 64) -> Iterator[dict]:
+        for text in texts:
+            yield self.extract(text)
+
+class HybridExtractor:
+    """
+    Tries the rules first and only sends texts whose rule confidence is below
+    min_confidence to the spaCy backend.
+    """
+    name = "hybrid"
+
+    def __init__(self, fallback=None, min_confidence: float = 0.9):
+        self.rules = RuleExtractor()
+        self.fallback = fallback or SpacyExtractor()
+        self.min_confidence = min_confidence
+        self.rule_hits = 0
+        self.fallbacks = 0
+
+    def warm_up(self):
+        self.fallback.warm_up()
+
+    def extract(self, text: str) -> dict:
+        info, confidence = self.rules.extract_with_confidence(text)
+        if confidence >= self.min_confidence:
+            self.rule_hits += 1
+            tracing.count("extract.rules")
+            return info
+        self.fallbacks += 1
+        tracing.count("extract.fallback")
+        return self.fallback.extract(text)
+
+    def extract_many(self, texts: Iterable[str], batch_size: int = 64) -> Iterator[dict]:
+        texts = iter(texts)
+        while True:
+            chunk = list(islice(texts, batch_size))
+            if not chunk:
+                return
+            infos = []
+            unsure = []
+            for i, text in enumerate(chunk):
+                info, confidence = self.rules.extract_with_confidence(text)
+                if confidence < self.min_confidence:
+                    unsure.append(i)
+                infos.append(info)
+            self.rule_hits += len(chunk) - len(unsure)
+            self.fallbacks += len(unsure)
+            tracing.count("extract.rules", len(chunk) - len(unsure))
+            tracing.count("extract.fallback", len(unsure))
+            # Low-confidence texts still go to spaCy as one batch
+            if unsure:
+                fallback_infos = self.fallback.extract_many([chunk[i] for i in unsure], batch_size=batch_size)
+                for i, info in zip(unsure, fallback_infos):
+                    infos[i] = info
+            yield from infos
+
+EXTRACTORS = {
+    SpacyExtractor.name: SpacyExtractor,
+    RuleExtractor.name: RuleExtractor,
+    HybridExtractor.name: HybridExtractor,
+}
+
+def get_extractor(name: str = "spacy"):
+    """Builds an extractor backend by name: "spacy", "rules" or "hybrid"."""
+    try:
+        return EXTRACTORS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown extractor '{name}', expected one of {sorted(EXTRACTORS)}") from None
@@ -0,0 +1,61 @@
+import threading
+from functools import lru_cache
+from PIL import ImageFont
+
+# Enough for every size the shrink search and the layouts hit, across a few font files
+FONT_CACHE_SIZE = 512
+
+class SharedFont(ImageFont.FreeTypeFont):
+    """
+    A FreeTypeFont that can be shared between threads: a FreeType face must not be
+    used by two threads at once, so measuring and rendering take the face's lock.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.RLock()
+
+    def getmetrics(self):
+        with self._lock:
+            return super().getmetrics()
+
+    def getlength(self, *args, **kwargs):
+        with self._lock:
+            return super().getlength(*args, **kwargs)
+
+    def getbbox(self, *args, **kwargs):
+        with self._lock:
+            return super().getbbox(*args, **kwargs)
+
+    def getmask2(self, *args, **kwargs):
+        # getmask and ImageDraw.text both render through here
+        with self._lock:
+            return super().getmask2(*args, **kwargs)
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def _load_font(path: str, size: int, index: int) -> SharedFont:
+    try:
+        return SharedFont(path, size, index=index)
+    except OSError:
+        # Let Pillow look the name up in the system font directories
+        return SharedFont(ImageFont.truetype(path, size, index=index).path, size, index=index)
+
+def get_font(font_path, size, index=0) -> ImageFont.FreeTypeFont:
+    """
+    Returns a shared ImageFont for font_path at size, parsing the file only on a cache miss.
+    index picks the face (variant) inside a font collection.
+    Fonts are safe to use from several threads (see SharedFont).
+    Least recently used fonts are dropped once FONT_CACHE_SIZE fonts are loaded.
+    """
+    return _load_font(str(font_path), int(size), index)
+
+def font_key(font: ImageFont.FreeTypeFont):
+    """The (path, size, index) get_font loads font by, for keying caches of per-font results."""
+    return (getattr(font, "path", id(font)), font.size, getattr(font, "index", 0))
+
+def font_cache_info():
+    """Hit/miss/size counters of the font cache (a functools CacheInfo)."""
+    return _load_font.cache_info()
+
+def clear_font_cache():
+    _load_font.cache_clear()
@@ -0,0 +1,510 @@
+import math
+import random
+from typing import List, NamedTuple, Optional, Tuple
+from PIL import Image, ImageDraw, ImageFont
+
+import tracing
+from font_cache import get_font
+from occupancy import OccupancyGrid, as_occupancy
+from palettes import WCAG_AA_LARGE, contrast_ratio, pick_region_colors, pick_text_color
+from sprites import get_text_sprite
+from text_metrics import measure_text
+from wrapping import LINE_SPACING, advance_table, wrap_words
+
+# Design size: layouts are planned in these pixels and scaled to the render target
+WIDTH, HEIGHT = 1080, 1350
+
+def get_text_dimensions(text: str, font: ImageFont.FreeTypeFont, spacing: int = LINE_SPACING) -> Tuple[int, int]:
+    """Get accurate text dimensions of the uppercased text, as textbbox reports them."""
+    return measure_text(text.upper(), font, spacing)
+
+def get_rotated_bbox(width: int, height: int, rotation: float) -> Tuple[int, int]:
+    """Calculate bounding box dimensions after rotation."""
+    if rotation == 0:
+        return width, height
+    
+    # Convert to radians
+    angle = math.radians(abs(rotation))
+    
+    # Calculate rotated dimensions using rotation matrix
+    cos_a = math.cos(angle)
+    sin_a = math.sin(angle)
+    
+    new_width = int(abs(width * cos_a) + abs(height * sin_a))
+    new_height = int(abs(width * sin_a) + abs(height * cos_a))
+    
+    return new_width, new_height
+
+def _record_placement(span, outcome: str):
+    span.set("outcome", outcome)
+    tracing.count(f"place.{outcome}")
+
+def find_non_overlapping_position(
+    text_width: int, 
+    text_height: int, 
+    preferred_x: int, 
+    preferred_y: int,
+    occupied_areas: List[Tuple[int, int, int, int]],
+    canvas_width: int = WIDTH,
+    canvas_height: int = HEIGHT,
+    margin: int = 20
+) -> Tuple[int, int]:
+    """Find a position that doesn't overlap with existing text."""
+    with tracing.span("place") as span:
+        occupied = as_occupancy(occupied_areas)
+
+        def position_is_valid(x: int, y: int) -> bool:
+            """Check if position is valid (in bounds and no overlaps)."""
+            # Check canvas boundaries
+            if (x < margin or y < margin or 
+                x + text_width > canvas_width - margin or 
+                y + text_height > canvas_height - margin):
+                return False
+        
+            # Check overlaps with existing text
+            return occupied.is_free(x, y, x + text_width, y + text_height, margin)
+    
+        # Try preferred position first
+        if position_is_valid(preferred_x, preferred_y):
+            _record_placement(span, "preferred")
+            return preferred_x, preferred_y
+    
+        # Spiral search around preferred position
+        max_radius = min(canvas_width, canvas_height) // 2
+    
+        for radius in range(50, max_radius, 30):
+            # Try positions in a circle around preferred position
+            for angle_deg in range(0, 360, 15):
+                angle_rad = math.radians(angle_deg)
+                x = int(preferred_x + radius * math.cos(angle_rad))
+                y = int(preferred_y + radius * math.sin(angle_rad))
+            
+                if position_is_valid(x, y):
+                    _record_placement(span, "spiral")
+                    return x, y
+    
+        # Fallback: nearest free spot on a coarse grid around the preferred position
+        position = occupied.nearest_free(
+            text_width, text_height, preferred_x, preferred_y,
+            bounds=(margin, margin, canvas_width - margin, canvas_height - margin),
+            margin=margin, step=100
+        )
+        if position is not None:
+            _record_placement(span, "nearest_free")
+            return position
+    
+        # Last resort: clamp to bounds and hope for the best
+        _record_placement(span, "clamp")
+        x = max(margin, min(preferred_x, canvas_width - text_width - margin))
+        y = max(margin, min(preferred_y, canvas_height - text_height - margin))
+        return x, y
+
+def _record_fit(span, measurements: int):
+    span.set("measurements", measurements)
+    tracing.count("fit.measurements", measurements)
+
+def _box_fits(position, box_width: int, box_height: int, canvas_size, occupied: OccupancyGrid) -> bool:
+    """Whether a box anchored at position stays on the canvas and clear of occupied."""
+    x, y = position
+    if x + box_width > canvas_size[0] or y + box_height > canvas_size[1]:
+        return False
+    # margin=1 so touching edges count as overlap
+    return occupied.is_free(x, y, x + box_width, y + box_height, margin=1)
+
+def _measure_block(text: str, font_path, size: int, stretch_factor: float, rotation: float):
+    """(font, width, height) of text at size, with the rotated bbox dimensions."""
+    font = get_font(font_path, int(size * stretch_factor))
+    width, height = get_text_dimensions(text, font)
+    return (font, *get_rotated_bbox(width, height, rotation))
+
+def fit_text_size(
+    text: str,
+    preferred_position: Tuple[int, int],
+    font_path,
+    size: int,
+    canvas_size: Tuple[int, int] = (WIDTH, HEIGHT),
+    stretch_factor: float = 1.0,
+    rotation: float = 0,
+    occupied_areas: Optional[List] = None,
+    min_size: int = 20
+) -> Optional[Tuple[ImageFont.FreeTypeFont, int, int]]:
+    """
+    Find the largest size in [min_size, size] at which text fits on the canvas at
+    preferred_position without touching occupied_areas.
+    Returns (font, width, height) with the rotated bbox dimensions, or None if nothing fits.
+    """
+    with tracing.span("fit") as span:
+        if size < min_size:
+            return None
+        occupied = as_occupancy(occupied_areas)
+        x, y = preferred_position
+        canvas_width, canvas_height = canvas_size
+
+        measurements = 0
+
+        def measure(current_size: int):
+            nonlocal measurements
+            measurements += 1
+            try:
+                return _measure_block(text, font_path, current_size, stretch_factor, rotation)
+            except Exception as e:
+                print(f"Error measuring text '{text}' at size {current_size}: {e}")
+                return None
+
+        def fits(text_width: int, text_height: int) -> bool:
+            return _box_fits(preferred_position, text_width, text_height, canvas_size, occupied)
+
+        # The box is anchored at preferred_position and only grows with the size,
+        # so "fits" is monotonic and the largest fitting size can be binary searched.
+        measured = measure(size)
+        if measured is not None and fits(*measured[1:]):
+            _record_fit(span, measurements)
+            return measured
+
+        best = None
+        lo, hi = min_size, size - 1
+        probe = (lo + hi) // 2
+        if measured is not None and measured[1] > 0 and measured[2] > 0:
+            # Extents scale roughly linearly with the size, so aim the first probe
+            # straight at the canvas bounds
+            scale = min((canvas_width - x) / measured[1], (canvas_height - y) / measured[2])
+            probe = max(lo, min(hi, int(size * scale)))
+
+        while lo <= hi:
+            measured = measure(probe)
+            if measured is not None and fits(*measured[1:]):
+                best = measured
+                lo = probe + 1
+            else:
+                hi = probe - 1
+            probe = (lo + hi) // 2
+
+        _record_fit(span, measurements)
+        return best
+
+def fit_text_block(
+    text: str,
+    preferred_position: Tuple[int, int],
+    font_path,
+    size: int,
+    canvas_size: Tuple[int, int] = (WIDTH, HEIGHT),
+    stretch_factor: float = 1.0,
+    rotation: float = 0,
+    occupied_areas: Optional[List] = None,
+    min_size: int = 20,
+    max_lines: int = 1
+) -> Optional[Tuple[str, ImageFont.FreeTypeFont, int, int]]:
+    """
+    fit_text_size that may also break text into up to max_lines lines. The size and
+    line breaks are picked together: for each line count the optimal breaks come
+    from the font's advance table (see wrapping), the largest size that fits is
+    searched on those estimates alone, and only the winner is measured for real.
+    Returns (text with "\n" between lines, font, width, height), or None.
+    Wraps only when the single line would have to shrink; ties go to fewer lines.
+    """
+    single = fit_text_size(
+        text, preferred_position, font_path, size,
+        canvas_size=canvas_size,
+        stretch_factor=stretch_factor,
+        rotation=rotation,
+        occupied_areas=occupied_areas,
+        min_size=min_size
+    )
+    best = (text,) + single if single is not None else None
+    words = text.split()
+    if max_lines <= 1 or len(words) < 2 or (single is not None and single[0].size >= int(size * stretch_factor)):
+        return best
+
+    with tracing.span("wrap") as span:
+        occupied = as_occupancy(occupied_areas)
+        table = advance_table(font_path)
+
+        def fits(text_width: int, text_height: int) -> bool:
+            return _box_fits(preferred_position, text_width, text_height, canvas_size, occupied)
+
+        best_size = single[0].size if single is not None else 0
+        for count in range(2, min(max_lines, len(words)) + 1):
+            # Widths are measured on the uppercased text, the way it is drawn
+            lines = wrap_words(text.upper().split(), table, count)
+            a, b, c = table.block_extent(lines)
+
+            def estimate_fits(current_size):
+                font_size = int(current_size * stretch_factor)
+                return fits(*get_rotated_bbox(math.ceil(a * font_size), math.ceil(b * font_size + c), rotation))
+
+            # Largest size the estimate allows; pure arithmetic, nothing is measured
+            lo, hi = min_size, size
+            while lo <= hi:
+                probe = (lo + hi) // 2
+                if estimate_fits(probe):
+                    lo = probe + 1
+                else:
+                    hi = probe - 1
+            current_size = hi
+            if current_size < min_size or int(current_size * stretch_factor) <= best_size:
+                continue
+
+            # Confirm with one real measurement, stepping down if kerning or hinting made it a little bigger
+            while current_size >= min_size:
+                font, width, height = _measure_block("\n".join(lines), font_path, current_size, stretch_factor, rotation)
+                if fits(width, height):
+                    break
+                current_size -= 1
+            else:
+                continue
+            if font.size > best_size:
+                # Keep the original capitalisation; the breaks fall between the same words
+                wrapped, start = [], 0
+                for line in lines:
+                    end = start + len(line.split())
+                    wrapped.append(" ".join(words[start:end]))
+                    start = end
+                best, best_size = ("\n".join(wrapped), font, width, height), font.size
+        span.set("lines", best[0].count("\n") + 1 if best is not None else 0)
+        return best
+
+class ElementSpec(NamedTuple):
+    """What one text block asks for, before any measuring."""
+    role: str                       # "name", "date" or "location"
+    text: str
+    position: Tuple[int, int]       # Preferred top-left corner
+    size: int                       # Largest size to try
+    color: Tuple[int, int, int]
+    stretch_factor: float = 1.0
+    rotation: float = 0
+    max_lines: int = 1              # Lines the text may be wrapped onto rather than shrunk
+
+class PlacedElement(NamedTuple):
+    spec: ElementSpec
+    font: ImageFont.FreeTypeFont
+    size: int                       # Fitted font size in pixels, stretch included
+    bbox: Tuple[int, int, int, int] # Rotated extent on the canvas
+    text: str                       # spec.text, with "\n" where it was wrapped
+
+class LayoutPlan(NamedTuple):
+    elements: List[PlacedElement]
+    missing: List[ElementSpec]      # Blocks that are empty or fit nowhere, even at min_size
+    canvas_size: Tuple[int, int]
+
+# How much each block matters when comparing candidate layouts
+ROLE_WEIGHTS = {"name": 3.0, "date": 2.0, "location": 1.5}
+
+def _adaptive_size(text: str, budget: int, low: int, high: int) -> int:
+    """Shorter texts get bigger sizes, between low and high."""
+    return min(high, max(low, budget // max(1, len(text))))
+
+def element_specs(event_name, date, location, colors, rng=None) -> List[ElementSpec]:
+    """
+    The three text blocks with randomized position, stretch and rotation.
+    Draws from rng in the same order apply_layout always has, so a seed gives the same specs.
+    Empty texts still get a spec (so the draws stay in step); plan_layout skips them.
+    """
+    if rng is None:
+        rng = random
+    bg_color, text_color, accent_color = colors
+    name = ElementSpec(
+        "name", event_name,
+        position=(rng.randint(50, 400), rng.randint(50, 400)),
+        size=_adaptive_size(event_name, 2000, 120, 220),
+        color=text_color,
+        stretch_factor=rng.uniform(0.8, 1.6),
+        rotation=rng.choice([0, 0, 0, 15, -15, 90, -90]),  # Favor horizontal
+        max_lines=3
+    )
+    date = ElementSpec(
+        "date", date,
+        position=(rng.randint(50, 600), rng.randint(600, 900)),
+        size=_adaptive_size(date, 800, 60, 100),
+        color=accent_color,
+        rotation=rng.choice([0, 0, 90, -90])
+    )
+    location = ElementSpec(
+        "location", location,
+        position=(rng.randint(50, 500), rng.randint(1000, 1200)),
+        size=_adaptive_size(location, 1000, 40, 120),
+        color=text_color,
+        stretch_factor=rng.uniform(0.9, 1.3),
+        rotation=rng.choice([0, 0, 0, 180]),  # Favor readable orientations
+        max_lines=2
+    )
+    return [name, date, location]
+
+def place_element(
+    spec: ElementSpec,
+    font_path,
+    occupied: OccupancyGrid,
+    canvas_size: Tuple[int, int] = (WIDTH, HEIGHT),
+    min_size: int = 20
+) -> Optional[PlacedElement]:
+    """
+    Fits spec at its preferred position, shrinking or wrapping it as needed. If it
+    does not fit there even at min_size, moves the min_size box (wrapped as narrow as
+    max_lines allows) to the nearest free spot and fits again.
+    Only measures; nothing is drawn.
+    """
+    def fit(position):
+        return fit_text_block(
+            spec.text, position, font_path, spec.size,
+            canvas_size=canvas_size,
+            stretch_factor=spec.stretch_factor,
+            rotation=spec.rotation,
+            occupied_areas=occupied,
+            min_size=min_size,
+            max_lines=spec.max_lines
+        )
+
+    position = spec.position
+    fitted = fit(position)
+    if fitted is None:
+        font = get_font(font_path, int(min_size * spec.stretch_factor))
+        words = spec.text.upper().split()
+        compact = spec.text
+        if spec.max_lines > 1 and len(words) > 1:
+            compact = "\n".join(wrap_words(words, advance_table(font_path), min(spec.max_lines, len(words))))
+        width, height = get_rotated_bbox(*get_text_dimensions(compact, font), spec.rotation)
+        position = find_non_overlapping_position(
+            width, height, position[0], position[1], occupied,
+            canvas_width=canvas_size[0], canvas_height=canvas_size[1]
+        )
+        fitted = fit(position)
+        if fitted is None:
+            return None
+
+    text, font, width, height = fitted
+    x, y = position
+    return PlacedElement(spec, font, font.size, (x, y, x + width, y + height), text)
+
+def plan_layout(
+    event_name, date, location, font_path, colors,
+    rng=None,
+    canvas_size: Tuple[int, int] = (WIDTH, HEIGHT),
+    min_size: int = 20
+) -> LayoutPlan:
+    """
+    Measures and places every text block without drawing anything.
+    Blocks with no text (e.g. no date was found) go straight to missing.
+    """
+    with tracing.span("plan"):
+        occupied = OccupancyGrid()
+        elements = []
+        missing = []
+        for spec in element_specs(event_name, date, location, colors, rng):
+            if not spec.text.strip():
+                missing.append(spec)
+                continue
+            placed = place_element(spec, font_path, occupied, canvas_size, min_size)
+            if placed is None:
+                missing.append(spec)
+                continue
+            elements.append(placed)
+            occupied.append(placed.bbox)
+        return LayoutPlan(elements, missing, canvas_size)
+
+def score_layout(plan: LayoutPlan) -> float:
+    """
+    Higher is better. Each block scores its role weight times how much of its
+    requested size it kept, minus how far it was pushed from where it wanted to be
+    (as a fraction of the canvas diagonal); a block that fit nowhere costs its weight.
+    """
+    diagonal = math.hypot(*plan.canvas_size)
+    score = 0.0
+    for element in plan.elements:
+        weight = ROLE_WEIGHTS.get(element.spec.role, 1.0)
+        kept = element.size / max(1, int(element.spec.size * element.spec.stretch_factor))
+        moved = math.hypot(element.bbox[0] - element.spec.position[0],
+                           element.bbox[1] - element.spec.position[1]) / diagonal
+        score += weight * (kept - moved)
+    for spec in plan.missing:
+        score -= ROLE_WEIGHTS.get(spec.role, 1.0)
+    return score
+
+def best_layout(
+    event_name, date, location, font_path, colors,
+    candidates: int = 1,
+    rng=None,
+    canvas_size: Tuple[int, int] = (WIDTH, HEIGHT),
+    min_size: int = 20
+) -> LayoutPlan:
+    """Plans candidates random layouts from rng and returns the highest scoring one (the first on ties)."""
+    best, best_score = None, None
+    for _ in range(max(1, candidates)):
+        plan = plan_layout(event_name, date, location, font_path, colors, rng, canvas_size, min_size)
+        score = score_layout(plan)
+        if best is None or score > best_score:
+            best, best_score = plan, score
+    tracing.count("layout.candidates", max(1, candidates))
+    return best
+
+def _scaled_font(text: str, element: PlacedElement, scale: float, spacing: int):
+    """
+    The element's font at scale, one size smaller at a time while hinting makes the
+    text outgrow its scaled box, so it never runs into the blocks placed around it.
+    spacing is the scaled gap between wrapped lines.
+    """
+    x, y, x2, y2 = element.bbox
+    max_width, max_height = math.ceil((x2 - x) * scale), math.ceil((y2 - y) * scale)
+    size = max(1, round(element.size * scale))
+    while True:
+        font = get_font(element.font.path, size, element.font.index)
+        width, height = get_rotated_bbox(*get_text_dimensions(text, font, spacing), element.spec.rotation)
+        if size == 1 or (width <= max_width and height <= max_height):
+            return font, width, height
+        size -= 1
+
+def _checked_color(base_img: Image.Image, box, color, min_contrast: float, background=None):
+    """
+    color, or black or white if color falls below min_contrast against what is drawn
+    under box. On a flat background nothing else can be under it, so no pixels are read.
+    """
+    if background is None:
+        return pick_region_colors(base_img, [box], [color], min_contrast)[0]
+    if contrast_ratio(color, background) >= min_contrast:
+        return tuple(color)
+    return pick_text_color(background, minimum=min_contrast)
+
+def render_layout(base_img: Image.Image, plan: LayoutPlan, scale: float = 1.0,
+                  min_contrast: Optional[float] = WCAG_AA_LARGE, background=None):
+    """
+    Draws a planned layout; the only step that touches pixels.
+    The plan is in design pixels; scale maps it onto base_img, so one plan can be
+    drawn as a thumbnail or a print-size poster. Fonts are re-rasterized at the
+    scaled size rather than resampled, and wrapped lines keep their spacing in scale.
+    Right before it is drawn, each block's color is checked against what is under
+    its box, earlier blocks included, and swapped for black or white if it falls
+    below min_contrast (None to skip). Pass background when base_img is just filled
+    with that color; the check then needs no pixels at all.
+    """
+    with tracing.span("rasterize"):
+        draw = ImageDraw.Draw(base_img)
+        spacing = round(LINE_SPACING * scale)
+        blocks = []
+        for element in plan.elements:
+            x, y, x2, y2 = element.bbox
+            font = element.font
+            text = element.text.upper()
+            if scale != 1:
+                font, width, height = _scaled_font(text, element, scale, spacing)
+                x, y = round(x * scale), round(y * scale)
+                x2, y2 = x + width, y + height
+            blocks.append((element.spec, text, font, (x, y, x2, y2)))
+
+        drawn = []
+        for spec, text, font, (x, y, x2, y2) in blocks:
+            color = spec.color
+            if min_contrast is not None:
+                # A block on top of an earlier one no longer sees the flat background
+                overlaps = any(x < bx2 and bx < x2 and y < by2 and by < y2 for bx, by, bx2, by2 in drawn)
+                color = _checked_color(base_img, (x, y, x2, y2), color, min_contrast,
+                                       None if overlaps else background)
+                if color != tuple(spec.color):
+                    tracing.count("contrast.adjusted")
+            drawn.append((x, y, x2, y2))
+            try:
+                if spec.rotation == 0:
+                    draw.text((x, y), text, font=font, fill=color, spacing=spacing)
+                else:
+                    # Rotated text comes from the sprite cache as a coverage mask;
+                    # print-size tiles are too big for it and are rendered uncached
+                    get_text_sprite(text, font, spec.rotation, x2 - x, y2 - y, spacing).paste(base_img, (x, y), tuple(color))
+            except Exception as e:
+                print(f"Error drawing text '{spec.text}': {e}")
@@ -1,13 +1,137 @@
 from poster_generator import generate_poster
+from encoders import extension_for
+import argparse
 import os
 from datetime import datetime
 
-if __name__ == "__main__":
+def encode_options(args) -> dict:
+    options = {}
+    if args.compress_level is not None:
+        options["compress_level"] = args.compress_level
+    if args.quality is not None:
+        options["quality"] = args.quality
+    return options
+
+def parse_size(value: str):
+    """Argument type for WIDTHxHEIGHT, e.g. 270x338."""
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got '{value}'")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"size must be positive, got '{value}'")
+    return width, height
+
+def run_batch(args):
+    from batch import generate_posters, read_events
+    from tracing import MetricsTracer
+
+    failed = 0
+    tracer = MetricsTracer() if args.metrics else None
+    if args.stream:
+        from streaming import stream_posters
+
+        if args.extraction_cache:
+            from event_extractor import configure_cache
+            configure_cache(path=args.extraction_cache)
+        results = stream_posters(
+            read_events(args.batch), args.out_dir,
+            extractor=args.extractor,
+            tracer=tracer,
+            seed=args.seed,
+            fmt=args.format,
+            encode_options=encode_options(args),
+            target_size=args.size,
+            layout_candidates=args.candidates
+        )
+    else:
+        results = generate_posters(
+            read_events(args.batch), args.out_dir,
+            workers=args.workers,
+            extractor=args.extractor,
+            extraction_cache=args.extraction_cache,
+            tracer=tracer,
+            seed=args.seed,
+            store=args.store,
+            fmt=args.format,
+            encode_options=encode_options(args),
+            target_size=args.size,
+            layout_candidates=args.candidates
+        )
+    for result in results:
+        if result.error:
+            failed += 1
+            print(f"[{result.index}] {result.error}")
+        else:
+            print(f"[{result.index}] Poster saved to {result.output_path}")
+    print(f"Done, {failed} failed")
+    if tracer is not None:
+        tracer.export(args.metrics)
+        print(f"Metrics written to {args.metrics}")
+
+def run_single(args):
+    from extractors import get_extractor
+    from tracing import MetricsTracer, set_tracer
+
     text = input("Enter event description: ")
 
     # Timestamp for output filename
     timestamp = datetime.now().strftime("%Y-%m-%d-%H%M%S")
-    output_path = os.path.join("outputs", f"poster-{timestamp}.png")
+    output_path = os.path.join(args.out_dir, f"poster-{timestamp}{extension_for(args.format)}")
+    os.makedirs(args.out_dir, exist_ok=True)
 
-    generate_poster(text, output_path)
+    if args.extraction_cache:
+        from event_extractor import configure_cache
+        configure_cache(path=args.extraction_cache)
+    tracer = MetricsTracer() if args.metrics else None
+    if tracer is not None:
+        set_tracer(tracer)
+    store = None
+    if args.store:
+        from output_store import OutputStore
+        store = OutputStore(args.store)
+    generate_poster(text, output_path, extractor=get_extractor(args.extractor), seed=args.seed, store=store,
+                    fmt=args.format, encode_options=encode_options(args), target_size=args.size,
+                    layout_candidates=args.candidates)
     print(f"Poster saved to {output_path}")
+    if tracer is not None:
+        tracer.export(args.metrics)
+        print(f"Metrics written to {args.metrics}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate event posters.")
+    parser.add_argument("--batch", metavar="FILE", help="JSONL, CSV or text file with one event per record")
+    parser.add_argument("--out-dir", default="outputs", help="Directory for output")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all CPUs)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Run the batch as a pipeline in one process with flat memory use, for very large inputs")
+    parser.add_argument("--extractor", default="spacy", choices=["spacy", "rules", "hybrid"],
+                        help="spaCy NER, rule-based, or rules with spaCy fallback")
+    parser.add_argument("--extraction-cache", metavar="DB", help="SQLite file to cache extraction results in")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="Write span timings and counters (.prom for Prometheus text, JSON otherwise)")
+    parser.add_argument("--seed", type=int, help="Render reproducibly; the same seed and text give the same poster")
+    parser.add_argument("--store", metavar="DIR",
+                        help="Keep rendered posters by content and reuse them (needs --seed)")
+    parser.add_argument("--format", default="png", choices=["png", "webp", "jpeg"], help="Output image format")
+    parser.add_argument("--compress-level", type=int, choices=range(10), metavar="0-9",
+                        help="PNG zlib level (default 6; 1 is much faster for a slightly larger file)")
+    parser.add_argument("--quality", type=int, help="WebP/JPEG quality, 1-100 (default 90)")
+    parser.add_argument("--size", type=parse_size, metavar="WxH",
+                        help="Output resolution, e.g. 270x338 for previews or 4320x5400 for print (default 1080x1350)")
+    parser.add_argument("--candidates", type=int, default=1, metavar="N",
+                        help="Plan N layouts per poster and draw the best scoring one (default 1)")
+    args = parser.parse_args()
+    if args.candidates < 1:
+        parser.error("--candidates must be at least 1")
+    if args.store and args.seed is None:
+        parser.error("--store needs --seed")
+    if args.stream and (args.store or args.workers):
+        parser.error("--stream runs in one process without a store; drop --store and --workers")
+    if not args.batch and (args.stream or args.workers):
+        parser.error("--stream and --workers only apply to --batch")
+
+    if args.batch:
+        run_batch(args)
+    else:
+        run_single(args)
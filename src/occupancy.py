@@ -0,0 +1,116 @@
+import math
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+Rect = Tuple[int, int, int, int]
+
+class OccupancyGrid:
+    """
+    Occupied (x1, y1, x2, y2) rectangles bucketed into a uniform grid.
+
+    Acts like the plain list of rectangles it replaces (append, iteration, len),
+    but a free-space query only looks at rectangles stored in the cells it
+    touches, so checks stay cheap with dozens of shapes and text blocks.
+    """
+
+    def __init__(self, rects: Iterable[Rect] = (), cell_size: int = 128):
+        self.cell_size = cell_size
+        self._rects: List[Rect] = []
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        for rect in rects:
+            self.append(rect)
+
+    def __iter__(self) -> Iterator[Rect]:
+        return iter(self._rects)
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def __getitem__(self, index: int) -> Rect:
+        return self._rects[index]
+
+    def _cell_ranges(self, x1, y1, x2, y2) -> Tuple[range, range]:
+        size = self.cell_size
+        return (range(math.floor(x1 / size), math.floor(x2 / size) + 1),
+                range(math.floor(y1 / size), math.floor(y2 / size) + 1))
+
+    def append(self, rect: Rect):
+        rect = tuple(rect)
+        index = len(self._rects)
+        self._rects.append(rect)
+        cols, rows = self._cell_ranges(*rect)
+        for cy in rows:
+            for cx in cols:
+                self._cells.setdefault((cx, cy), []).append(index)
+
+    def is_free(self, x1: int, y1: int, x2: int, y2: int, margin: int = 0) -> bool:
+        """
+        True if the rectangle stays at least margin pixels clear of every stored one.
+        With margin=0 rectangles that only share an edge do not overlap.
+        """
+        cols, rows = self._cell_ranges(x1 - margin, y1 - margin, x2 + margin, y2 + margin)
+        if len(cols) * len(rows) >= len(self._rects):
+            # Query spans more cells than there are rectangles; a plain scan is cheaper
+            candidates = range(len(self._rects))
+        else:
+            candidates = {index
+                          for cy in rows for cx in cols
+                          for index in self._cells.get((cx, cy), ())}
+
+        for index in candidates:
+            ox1, oy1, ox2, oy2 = self._rects[index]
+            if not (x2 + margin <= ox1 or x1 >= ox2 + margin or
+                    y2 + margin <= oy1 or y1 >= oy2 + margin):
+                return False
+        return True
+
+    def nearest_free(
+        self,
+        width: int,
+        height: int,
+        x: int,
+        y: int,
+        bounds: Rect,
+        margin: int = 0,
+        step: int = 25
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Find the free top-left position closest to (x, y) for a width x height box.
+
+        Candidates lie on a lattice of step pixels anchored at (x, y) and the box
+        must stay inside bounds. Square rings of lattice points are visited outward;
+        a point on ring r is between r and r * sqrt(2) steps away, so after the first
+        free spot only the rings that could still hold a closer one are searched.
+        Returns the free lattice point nearest to (x, y) (the first found on ties),
+        or None if no lattice point is free.
+        """
+        bx1, by1, bx2, by2 = bounds
+        # Lattice indices whose box stays inside the bounds
+        min_i, max_i = math.ceil((bx1 - x) / step), math.floor((bx2 - width - x) / step)
+        min_j, max_j = math.ceil((by1 - y) / step), math.floor((by2 - height - y) / step)
+        if min_i > max_i or min_j > max_j:
+            return None
+
+        max_ring = max(abs(min_i), abs(max_i), abs(min_j), abs(max_j))
+        best = None
+        for ring in range(max_ring + 1):
+            if best is not None and ring * ring >= best[0]:
+                break
+            for i in range(max(-ring, min_i), min(ring, max_i) + 1):
+                # Full columns on the ring's left and right edges, top and bottom points in between
+                if abs(i) == ring:
+                    js = range(max(-ring, min_j), min(ring, max_j) + 1)
+                else:
+                    js = [j for j in (-ring, ring) if min_j <= j <= max_j]
+                for j in js:
+                    px, py = x + i * step, y + j * step
+                    if self.is_free(px, py, px + width, py + height, margin):
+                        distance = i * i + j * j
+                        if best is None or distance < best[0]:
+                            best = (distance, px, py)
+        return (best[1], best[2]) if best is not None else None
+
+def as_occupancy(occupied_areas) -> OccupancyGrid:
+    """Wraps a list of rectangles in an OccupancyGrid; grids are returned unchanged."""
+    if isinstance(occupied_areas, OccupancyGrid):
+        return occupied_areas
+    return OccupancyGrid(occupied_areas or ())
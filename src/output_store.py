@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+SRC_DIR = Path(__file__).resolve().parent
+
+_code_version = None
+
+def code_version() -> str:
+    """
+    Hash of the renderer's source files. Any code change gives every poster a new key,
+    so stale outputs are never served after an upgrade.
+    """
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        for path in sorted(SRC_DIR.glob("*.py")):
+            digest.update(path.name.encode("utf-8"))
+            digest.update(path.read_bytes())
+        _code_version = digest.hexdigest()[:16]
+    return _code_version
+
+@lru_cache(maxsize=64)
+def _file_digest(path: str) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()[:16]
+
+def derive_seed(base_seed: int, text: str) -> int:
+    """
+    Per-poster seed from a batch seed and the text itself, so inserting or
+    reordering inputs does not change the seeds (and keys) of the others.
+    """
+    digest = hashlib.sha256(f"{base_seed}\0{text}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+def poster_key(text, seed, font_path, palette=None, canvas_size=None, extractor="spacy", fmt="png",
+               layout_candidates=1) -> str:
+    """
+    Content address of a poster: everything that determines its pixels.
+    The font enters by content, not just by path.
+    """
+    payload = {
+        "text": text,
+        "seed": seed,
+        "font": _file_digest(str(font_path)),
+        "palette": [list(color) for color in palette] if palette else None,
+        "canvas": list(canvas_size) if canvas_size else None,
+        "extractor": extractor,
+        "format": fmt,
+        "candidates": layout_candidates,
+        "code": code_version(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+class OutputStore:
+    """
+    Rendered posters stored under their content key, as root/ab/<key>.<ext>.
+    Files are written atomically, so concurrent workers never see partial posters.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, key: str, suffix: str = ".png") -> Path:
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def get(self, key: str, suffix: str = ".png") -> Optional[Path]:
+        path = self.path_for(key, suffix)
+        if path.is_file():
+            self.hits += 1
+            return path
+        self.misses += 1
+        return None
+
+    def put(self, key: str, save, suffix: str = ".png") -> Path:
+        """
+        Stores a freshly rendered poster. save(path) writes the file, e.g. img.save;
+        it writes to a temp file that is renamed into place once complete.
+        """
+        path = self.path_for(key, suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=f".tmp{suffix}")
+        os.close(fd)
+        try:
+            save(tmp_path)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return path
+
+    def export(self, stored_path: Path, output_path):
+        """
+        Places a stored poster at output_path, hard-linking when the filesystem allows it.
+        An existing file is unlinked first, never overwritten, since it may be a link into the store.
+        """
+        output_path = Path(output_path)
+        if output_path.exists():
+            if output_path.samefile(stored_path):
+                return
+            output_path.unlink()
+        try:
+            os.link(stored_path, output_path)
+        except OSError:
+            shutil.copyfile(stored_path, output_path)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
@@ -1,10 +1,196 @@
 import random
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
 
 PALETTES = [
     [(255, 255, 255), (0, 0, 0), (255, 0, 255)],
 	[(0, 0, 0), (255, 255, 255), (0, 255, 255)],
-	[(255, 255, 255), (0, 0, 0), (255, 211, 0)]
+	[(255, 255, 255), (0, 0, 0), (255, 211, 0)],
+	[(255, 100, 100), (50, 50, 50), (255, 255, 100)]
 ]
 
-def get_random_palette():
-    return random.choice(PALETTES)
+# WCAG 2.x minimum contrast ratios
+WCAG_AA = 4.5        # Body text
+WCAG_AA_LARGE = 3.0  # Large text (24px+, or 18.7px+ bold); every poster block qualifies
+
+TEXT_CANDIDATES = [(0, 0, 0), (255, 255, 255)]
+
+# sRGB channel value -> linear light, the expensive part of relative luminance, for all 256 values
+_channel = np.arange(256) / 255
+LINEAR = np.where(_channel <= 0.03928, _channel / 12.92, ((_channel + 0.055) / 1.055) ** 2.4)
+_LINEAR = LINEAR.tolist()
+LUMA_WEIGHTS = np.array([0.2126, 0.7152, 0.0722])
+
+Color = Tuple[int, int, int]
+
+def luminance(rgb) -> float:
+    """WCAG relative luminance of one color, via the linear-light table."""
+    r, g, b = rgb[:3]
+    return 0.2126 * _LINEAR[r] + 0.7152 * _LINEAR[g] + 0.0722 * _LINEAR[b]
+
+def luminance_array(pixels: np.ndarray) -> np.ndarray:
+    """Relative luminance of every RGB pixel in an (..., 3+) uint8 array."""
+    return LINEAR[pixels[..., :3]] @ LUMA_WEIGHTS
+
+def contrast_from_luminance(l1, l2):
+    """WCAG contrast ratio; works elementwise on arrays."""
+    return (np.maximum(l1, l2) + 0.05) / (np.minimum(l1, l2) + 0.05)
+
+class PaletteTable:
+    """
+    Every color of the registered palettes, plus the text candidates, with their
+    luminance and the full pairwise contrast matrix computed once on registration,
+    so picking readable text colors is a table lookup.
+    """
+
+    def __init__(self, text_candidates: Sequence[Color] = TEXT_CANDIDATES):
+        self.palettes: List[List[Color]] = []
+        self.colors: List[Color] = []
+        self._index = {}
+        self.luminance = np.empty(0)
+        self.contrast = np.empty((0, 0))
+        self._rows = []
+        self._luminance = []
+        self._add_colors(text_candidates)
+
+    def _add_colors(self, colors):
+        new = []
+        for color in colors:
+            color = tuple(color[:3])
+            if color not in self._index:
+                self._index[color] = len(self.colors)
+                self.colors.append(color)
+                new.append(color)
+        if new:
+            self.luminance = luminance_array(np.array(self.colors, dtype=np.uint8))
+            self.contrast = contrast_from_luminance(self.luminance[:, None], self.luminance[None, :])
+            # Plain lists for the scalar lookups; indexing a NumPy array one element at a time is slower
+            self._rows = self.contrast.tolist()
+            self._luminance = self.luminance.tolist()
+
+    def register(self, palette: Sequence[Color]) -> int:
+        """Adds a palette (background first, then text/accent colors) and returns its index."""
+        palette = [tuple(color[:3]) for color in palette]
+        self._add_colors(palette)
+        self.palettes.append(palette)
+        return len(self.palettes) - 1
+
+    def contrast_ratio(self, c1, c2) -> float:
+        i, j = self._index.get(tuple(c1[:3])), self._index.get(tuple(c2[:3]))
+        if i is not None and j is not None:
+            return self._rows[i][j]
+        # Colors outside the table are computed, not added, so arbitrary inputs can't grow it
+        l1, l2 = luminance(c1), luminance(c2)
+        return (max(l1, l2) + 0.05) / (min(l1, l2) + 0.05)
+
+    def pick_text_color(self, bg_color, candidates: Optional[Sequence[Color]] = None, minimum: float = WCAG_AA) -> Color:
+        """
+        The first candidate with at least minimum contrast on bg_color, or the one
+        with the most contrast if none qualifies.
+        """
+        candidates = TEXT_CANDIDATES if candidates is None else candidates
+        row = self._index.get(tuple(bg_color[:3]))
+        # A background outside the table has its luminance computed once for all candidates
+        bg_luminance = luminance(bg_color) if row is None else None
+        ratios = []
+        for color in candidates:
+            column = self._index.get(tuple(color[:3]))
+            if row is not None and column is not None:
+                ratio = self._rows[row][column]
+            else:
+                l1 = self._luminance[row] if row is not None else bg_luminance
+                l2 = self._luminance[column] if column is not None else luminance(color)
+                ratio = (max(l1, l2) + 0.05) / (min(l1, l2) + 0.05)
+            if ratio >= minimum:
+                return tuple(color)
+            ratios.append(ratio)
+        return tuple(candidates[ratios.index(max(ratios))])
+
+    def scheme(self, palette: Sequence[Color], minimum: float = WCAG_AA_LARGE) -> Tuple[Color, Color, Color]:
+        """
+        (background, text, accent) for a palette. Its first color is the background;
+        text and accent are its other colors in order of preference, falling back to
+        black or white when a palette color lacks minimum contrast on the background.
+        """
+        bg = tuple(palette[0][:3])
+        others = [tuple(color[:3]) for color in palette[1:]] or list(TEXT_CANDIDATES)
+        fallback = list(TEXT_CANDIDATES)
+        text = self.pick_text_color(bg, others + fallback, minimum)
+        accents = [color for color in reversed(others) if color != text]
+        accent = self.pick_text_color(bg, accents + fallback, minimum) if accents else text
+        return bg, text, accent
+
+_table = PaletteTable()
+for _palette in PALETTES:
+    _table.register(_palette)
+
+def get_palette_table() -> PaletteTable:
+    return _table
+
+def register_palette(palette: Sequence[Color]) -> int:
+    """Makes a palette available to get_random_palette, with its contrasts precomputed."""
+    PALETTES.append(list(palette))
+    return _table.register(palette)
+
+def get_random_palette(rng=random):
+    return rng.choice(PALETTES)
+
+def contrast_ratio(c1, c2) -> float:
+    return _table.contrast_ratio(c1, c2)
+
+def pick_text_color(bg_color, candidates=None, minimum: float = WCAG_AA) -> Color:
+    return _table.pick_text_color(bg_color, candidates, minimum)
+
+def color_scheme(palette, minimum: float = WCAG_AA_LARGE) -> Tuple[Color, Color, Color]:
+    return _table.scheme(palette, minimum)
+
+# Regions larger than this are sampled on a regular grid
+MAX_REGION_SAMPLES = 16 * 1024
+# Regions up to this size are copied out of the canvas whole, larger ones row by sampled row
+MAX_REGION_COPY = 512 * 1024
+
+def region_contrast(img, bboxes, colors, percentile: float = 10) -> np.ndarray:
+    """
+    Contrast of text colors against what is actually drawn under them.
+    For each (x1, y1, x2, y2) bbox and each color, the contrast ratio with every
+    background pixel in the box, summarised by its percentile-th percentile so a
+    few stray pixels don't decide. Returns a (len(bboxes), len(colors)) array;
+    boxes entirely off the canvas score inf. Only the sampled boxes are copied
+    out of img, never the whole canvas.
+    """
+    text_luminance = np.array([luminance(color) for color in colors])
+    scores = np.full((len(bboxes), len(colors)), np.inf)
+    width, height = img.size
+    for row, (x1, y1, x2, y2) in enumerate(bboxes):
+        x1, y1 = max(0, int(x1)), max(0, int(y1))
+        x2, y2 = min(width, int(x2)), min(height, int(y2))
+        if x1 >= x2 or y1 >= y2:
+            continue
+        step = max(1, int(np.ceil(np.sqrt((x2 - x1) * (y2 - y1) / MAX_REGION_SAMPLES))))
+        if (x2 - x1) * (y2 - y1) <= MAX_REGION_COPY:
+            sample = np.asarray(img.crop((x1, y1, x2, y2)))[::step, ::step]
+        else:
+            sample = np.stack([np.asarray(img.crop((x1, y, x2, y + 1)))[0, ::step] for y in range(y1, y2, step)])
+        region = luminance_array(sample).ravel()
+        ratios = contrast_from_luminance(region[None, :], text_luminance[:, None])
+        scores[row] = np.percentile(ratios, percentile, axis=1)
+    return scores
+
+def pick_region_colors(img, bboxes, preferred, minimum: float = WCAG_AA_LARGE, candidates=None) -> List[Color]:
+    """
+    For each bbox, its preferred color if that reaches minimum contrast against the
+    rendered background under it, else the first candidate (default: black, white)
+    that does, else whichever of them contrasts most.
+    """
+    candidates = [tuple(c) for c in (TEXT_CANDIDATES if candidates is None else candidates)]
+    options = list(dict.fromkeys([tuple(color) for color in preferred] + candidates))
+    column = {color: i for i, color in enumerate(options)}
+    # One pass over each region scores every color at once
+    scores = region_contrast(img, bboxes, options)
+    chosen = []
+    for row, color in enumerate(preferred):
+        ordered = [tuple(color)] + [c for c in candidates if c != tuple(color)]
+        ratios = scores[row, [column[c] for c in ordered]]
+        passing = np.flatnonzero(ratios >= minimum)
+        chosen.append(ordered[passing[0]] if passing.size else ordered[int(np.argmax(ratios))])
+    return chosen
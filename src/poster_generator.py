@@ -1,104 +1,21 @@
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import random
-import math
 from typing import List, Tuple, Optional
 from event_extractor import extract_event_info
+from sprites import get_text_sprite
+from typography import resolve_font_path
+import tracing
+from output_store import poster_key
+from encoders import extension_for, format_for_path, format_id, save_image
+from palettes import color_scheme, get_random_palette
+from layout import HEIGHT, WIDTH, best_layout, fit_text_block, render_layout
 
-WIDTH, HEIGHT = 1080, 1350
+THUMBNAIL_SIZE = (WIDTH // 4, round(HEIGHT / 4))
+PRINT_SIZE = (WIDTH * 4, HEIGHT * 4)
 
-def get_text_dimensions(text: str, font: ImageFont.FreeTypeFont) -> Tuple[int, int]:
-    """Get accurate text dimensions using textbbox."""
-    # Create temporary image to measure text
-    temp_img = Image.new('RGB', (1, 1))
-    temp_draw = ImageDraw.Draw(temp_img)
-    
-    # Get bounding box - this gives us the actual text dimensions
-    bbox = temp_draw.textbbox((0, 0), text.upper(), font=font)
-    width = bbox[2] - bbox[0]
-    height = bbox[3] - bbox[1]
-    
-    return width, height
-
-def get_rotated_bbox(width: int, height: int, rotation: float) -> Tuple[int, int]:
-    """Calculate bounding box dimensions after rotation."""
-    if rotation == 0:
-        return width, height
-    
-    # Convert to radians
-    angle = math.radians(abs(rotation))
-    
-    # Calculate rotated dimensions using rotation matrix
-    cos_a = math.cos(angle)
-    sin_a = math.sin(angle)
-    
-    new_width = int(abs(width * cos_a) + abs(height * sin_a))
-    new_height = int(abs(width * sin_a) + abs(height * cos_a))
-    
-    return new_width, new_height
-
-def find_non_overlapping_position(
-    text_width: int, 
-    text_height: int, 
-    preferred_x: int, 
-    preferred_y: int,
-    occupied_areas: List[Tuple[int, int, int, int]],
-    canvas_width: int = WIDTH,
-    canvas_height: int = HEIGHT,
-    margin: int = 20
-) -> Tuple[int, int]:
-    """Find a position that doesn't overlap with existing text."""
-    
-    def rect_overlaps(x1: int, y1: int, w1: int, h1: int, 
-                     x2: int, y2: int, x2_end: int, y2_end: int) -> bool:
-        """Check if two rectangles overlap with margin."""
-        return not (x1 + w1 + margin <= x2 or 
-                   x1 >= x2_end + margin or 
-                   y1 + h1 + margin <= y2 or 
-                   y1 >= y2_end + margin)
-    
-    def position_is_valid(x: int, y: int) -> bool:
-        """Check if position is valid (in bounds and no overlaps)."""
-        # Check canvas boundaries
-        if (x < margin or y < margin or 
-            x + text_width > canvas_width - margin or 
-            y + text_height > canvas_height - margin):
-            return False
-        
-        # Check overlaps with existing text
-        for occupied in occupied_areas:
-            if rect_overlaps(x, y, text_width, text_height, *occupied):
-                return False
-        
-        return True
-    
-    # Try preferred position first
-    if position_is_valid(preferred_x, preferred_y):
-        return preferred_x, preferred_y
-    
-    # Spiral search around preferred position
-    max_radius = min(canvas_width, canvas_height) // 2
-    
-    for radius in range(50, max_radius, 30):
-        # Try positions in a circle around preferred position
-        for angle_deg in range(0, 360, 15):
-            angle_rad = math.radians(angle_deg)
-            x = int(preferred_x + radius * math.cos(angle_rad))
-            y = int(preferred_y + radius * math.sin(angle_rad))
-            
-            if position_is_valid(x, y):
-                return x, y
-    
-    # Fallback: try grid positions
-    grid_size = 100
-    for y in range(margin, canvas_height - text_height - margin, grid_size):
-        for x in range(margin, canvas_width - text_width - margin, grid_size):
-            if position_is_valid(x, y):
-                return x, y
-    
-    # Last resort: clamp to bounds and hope for the best
-    x = max(margin, min(preferred_x, canvas_width - text_width - margin))
-    y = max(margin, min(preferred_y, canvas_height - text_height - margin))
-    return x, y
+def render_scale(target_size: Tuple[int, int]) -> float:
+    """Factor from design pixels to target_size, fitting the poster inside it."""
+    return min(target_size[0] / WIDTH, target_size[1] / HEIGHT)
 
 # def draw_event_text(
 #     base_img: Image.Image,
@@ -179,129 +96,173 @@ def draw_event_text(
     stretch_factor: float = 1.0,
     rotation: float = 0,
     occupied_areas: Optional[List] = None,
-    min_size: int = 20
+    min_size: int = 20,
+    max_lines: int = 1
 ) -> Optional[Tuple[int, int, int, int]]:
-    """Draw text with dynamic resizing to avoid overflow and overlaps."""
+    """
+    Draw text with dynamic resizing to avoid overflow and overlaps.
+    With max_lines > 1, text that would otherwise shrink is wrapped onto up to that many lines.
+    A standalone API for drawing one block straight onto an image: render_poster
+    plans all blocks first and draws them with layout.render_layout instead.
+    """
+    with tracing.span("draw_text"):
 
-    if occupied_areas is None:
-        occupied_areas = []
+        fitted = fit_text_block(
+            text, preferred_position, font_path, size,
+            canvas_size=(base_img.width, base_img.height),
+            stretch_factor=stretch_factor,
+            rotation=rotation,
+            occupied_areas=occupied_areas,
+            min_size=min_size,
+            max_lines=max_lines
+        )
+        if fitted is None:
+            tracing.count("fit.failed")
+            print(f"Could not fit text '{text}' even at minimum size {min_size}")
+            return None
+        text, font, text_width, text_height = fitted
 
-    current_size = size
-
-    while current_size >= min_size:
         try:
-            font = ImageFont.truetype(str(font_path), int(current_size * stretch_factor))
-
-            text_width, text_height = get_text_dimensions(text, font)
-            if rotation != 0:
-                text_width, text_height = get_rotated_bbox(text_width, text_height, rotation)
-
-            # Check if text fits inside canvas bounds
-            if (preferred_position[0] + text_width > base_img.width or
-                preferred_position[1] + text_height > base_img.height):
-                current_size -= 5
-                continue
-
-            # Check overlap with existing areas
-            overlaps = False
-            for (ox1, oy1, ox2, oy2) in occupied_areas:
-                if not (preferred_position[0] + text_width < ox1 or
-                        preferred_position[0] > ox2 or
-                        preferred_position[1] + text_height < oy1 or
-                        preferred_position[1] > oy2):
-                    overlaps = True
-                    break
-            if overlaps:
-                current_size -= 5
-                continue
-
-            # Passed checks, draw the text (you can reuse your existing drawing logic here)
-            draw = ImageDraw.Draw(base_img)
-            if rotation == 0:
-                draw.text(preferred_position, text.upper(), font=font, fill=color)
-            else:
-                # Same temp_img + rotate + paste logic as before
-                temp_img = Image.new("RGBA", (text_width + 100, text_height + 100), (0, 0, 0, 0))
-                temp_draw = ImageDraw.Draw(temp_img)
-                temp_x = (temp_img.width - text_width) // 2
-                temp_y = (temp_img.height - text_height) // 2
-                temp_draw.text((temp_x, temp_y), text.upper(), font=font, fill=color)
-                rotated = temp_img.rotate(rotation, expand=True)
-                paste_x = preferred_position[0] - (rotated.width - text_width) // 2
-                paste_y = preferred_position[1] - (rotated.height - text_height) // 2
-                base_img.paste(rotated, (paste_x, paste_y), rotated)
-
-            return (preferred_position[0], preferred_position[1],
-                    preferred_position[0] + text_width, preferred_position[1] + text_height)
-
+            with tracing.span("rasterize"):
+                if rotation == 0:
+                    draw = ImageDraw.Draw(base_img)
+                    draw.text(preferred_position, text.upper(), font=font, fill=color)
+                else:
+                    # Rotated text comes from the sprite cache as a coverage mask
+                    sprite = get_text_sprite(text.upper(), font, rotation, text_width, text_height)
+                    sprite.paste(base_img, preferred_position, tuple(color))
         except Exception as e:
-            print(f"Error drawing text '{text}' at size {current_size}: {e}")
-            current_size -= 5
-
-    print(f"Could not fit text '{text}' even at minimum size {min_size}")
-    return None
-
-def apply_layout(base_img, event_name, date, location, font_path, colors):
-    """Apply layout with improved text placement."""
-    bg_color, text_color, accent_color = colors
-    occupied = []
+            print(f"Error drawing text '{text}': {e}")
+            return None
 
-    # Event name - largest, most prominent
-    bbox = draw_event_text(
-        base_img, event_name,
-        preferred_position=(random.randint(50, 400), random.randint(50, 400)),
-        font_path=font_path, 
-        size=min(220, max(120, 2000 // len(event_name))),  # Adaptive sizing
-        color=text_color,
-        stretch_factor=random.uniform(0.8, 1.6),
-        rotation=random.choice([0, 0, 0, 15, -15, 90, -90]),  # Favor horizontal
-        occupied_areas=occupied
-    )
-    if bbox:
-        occupied.append(bbox)
+        return (preferred_position[0], preferred_position[1],
+                preferred_position[0] + text_width, preferred_position[1] + text_height)
 
-    # Date - secondary importance
-    bbox = draw_event_text(
-        base_img, date,
-        preferred_position=(random.randint(50, 600), random.randint(600, 900)),
-        font_path=font_path, 
-        size=min(100, max(60, 800 // len(date))),
-        color=accent_color,
-        rotation=random.choice([0, 0, 90, -90]),
-        occupied_areas=occupied
-    )
-    if bbox:
-        occupied.append(bbox)
+def apply_layout(
+    base_img, event_name, date, location, font_path, colors,
+    rng=None, candidates=1, scale=1.0, canvas_size=None, min_size=20, background=None
+):
+    """
+    Apply layout with improved text placement.
+    Pass a random.Random as rng for reproducible layouts; the global random module is used otherwise.
+    With candidates > 1, that many layouts are planned from measurements alone and
+    only the best scoring one is drawn (see layout.best_layout).
+    The layout is planned on canvas_size design pixels (default: base_img's size
+    divided by scale) and drawn scaled onto base_img, so the same rng gives the same
+    poster at every scale. Blocks that do not fit even at min_size are left out.
+    background is the flat color base_img is filled with, if it is (see layout.render_layout).
+    """
+    if canvas_size is None:
+        canvas_size = (round(base_img.width / scale), round(base_img.height / scale))
 
-    # Location - supporting text
-    bbox = draw_event_text(
-        base_img, location,
-        preferred_position=(random.randint(50, 500), random.randint(1000, 1200)),
-        font_path=font_path, 
-        size=min(120, max(40, 1000 // len(location))),
-        color=text_color,
-        stretch_factor=random.uniform(0.9, 1.3),
-        rotation=random.choice([0, 0, 0, 180]),  # Favor readable orientations
-        occupied_areas=occupied
-    )
-    if bbox:
-        occupied.append(bbox)
+    with tracing.span("layout"):
+        plan = best_layout(
+            event_name, date, location, font_path, colors,
+            candidates=candidates, rng=rng,
+            canvas_size=canvas_size, min_size=min_size
+        )
+        for spec in plan.missing:
+            if not spec.text.strip():
+                continue
+            tracing.count("fit.failed")
+            print(f"Could not fit text '{spec.text}' even at minimum size {min_size}")
+        render_layout(base_img, plan, scale, background=background)
 
-# Updated generate_poster function
-def generate_poster(text, output_path, font_path="data/fonts/Roboto-Regular.ttf"):
-    """Generate poster with improved text placement."""
-    event_info = extract_event_info(text)
+def render_poster(event_info, font_path=None, rng=None, layout_candidates=1, target_size=None, palette=None,
+                  canvas=None) -> Image.Image:
+    """
+    Render a poster image from already extracted event info.
+    The same rng seed always gives the same poster.
+    palette (background first) defaults to one drawn from palettes.PALETTES with rng;
+    text and accent colors are picked from it to meet WCAG contrast on the background.
+    layout_candidates > 1 picks the best of that many planned layouts.
+    target_size (width, height) renders the same design at another resolution,
+    e.g. THUMBNAIL_SIZE for previews or PRINT_SIZE for print; default is the design size.
+    """
+    if font_path is None:
+        font_path = resolve_font_path("regular")
     event_name = event_info.get("event_name", "Event Name")
     date = event_info.get("date", "Date")
     location = event_info.get("location", "Location")
 
     # Create base image with background
-    palette = [(255, 100, 100), (50, 50, 50), (255, 255, 100)]  # Sample palette
-    bg_color = palette[0]
-    text_color = (255, 255, 255)  # White for contrast
-    accent_color = palette[2]
+    if palette is None:
+        palette = get_random_palette(rng or random)
+    bg_color, text_color, accent_color = color_scheme(palette)
 
-    img = Image.new("RGB", (WIDTH, HEIGHT), color=bg_color)
-    apply_layout(img, event_name, date, location, font_path, (bg_color, text_color, accent_color))
+    with tracing.span("render"):
+        target_size = tuple(target_size or (WIDTH, HEIGHT))
+        if canvas is not None:
+            if canvas.size != target_size or canvas.mode != "RGB":
+                raise ValueError(f"canvas must be an RGB image of {target_size}, got {canvas.mode} {canvas.size}")
+            img = canvas
+            img.paste(bg_color, (0, 0) + target_size)
+        else:
+            img = Image.new("RGB", target_size, color=bg_color)
+        apply_layout(img, event_name, date, location, font_path, (bg_color, text_color, accent_color),
+                     rng=rng, candidates=layout_candidates,
+                     scale=render_scale(target_size), canvas_size=(WIDTH, HEIGHT), background=bg_color)
+    return img
 
-    img.save(output_path)
+# Updated generate_poster function
+def generate_poster(
+    text,
+    output_path,
+    font_path=None,
+    event_info=None,
+    extractor=None,
+    seed=None,
+    store=None,
+    fmt=None,
+    encode_options=None,
+    target_size=None,
+    palette=None,
+    layout_candidates=1
+):
+    """
+    Generate poster with improved text placement.
+    Pass event_info (event_name/date/location) to skip the extraction step, or an
+    extractor backend (see extractors.get_extractor) to replace spaCy.
+    A seed makes the poster reproducible; with a seed and an OutputStore, a poster
+    rendered before is copied from the store instead of being rendered again.
+    fmt ("png", "webp" or "jpeg") defaults to the output file's extension;
+    encode_options are passed to encoders.save_options, e.g. {"compress_level": 1}.
+    target_size is the output resolution and palette overrides the random one (see render_poster);
+    layout_candidates > 1 draws the best of that many planned layouts.
+    """
+    target_size = tuple(target_size or (WIDTH, HEIGHT))
+    fmt = fmt or format_for_path(output_path)
+    encode_options = encode_options or {}
+    with tracing.span("poster"):
+        if font_path is None:
+            font_path = resolve_font_path("regular")
+
+        key = None
+        if store is not None and seed is not None and event_info is None:
+            key = poster_key(
+                text, seed, font_path,
+                palette=palette,
+                canvas_size=target_size,
+                extractor=getattr(extractor, "name", "spacy"),
+                fmt=format_id(fmt, **encode_options),
+                layout_candidates=layout_candidates
+            )
+            stored = store.get(key, extension_for(fmt))
+            if stored is not None:
+                tracing.count("store.hit")
+                store.export(stored, output_path)
+                return
+            tracing.count("store.miss")
+
+        if event_info is None:
+            with tracing.span("extract"):
+                event_info = extractor.extract(text) if extractor else extract_event_info(text)
+        rng = random.Random(seed) if seed is not None else None
+        img = render_poster(event_info, font_path, rng=rng, layout_candidates=layout_candidates,
+                            target_size=target_size, palette=palette)
+        with tracing.span("encode"):
+            if key is not None:
+                save = lambda path: save_image(img, path, fmt, **encode_options)
+                store.export(store.put(key, save, extension_for(fmt)), output_path)
+            else:
+                save_image(img, output_path, fmt, **encode_options)
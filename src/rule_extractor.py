@@ -0,0 +1,96 @@
+import re
+from typing import NamedTuple, Optional, Tuple
+from event_extractor import event_info_from_spans
+
+class Match(NamedTuple):
+    start_char: int
+    end_char: int
+    text: str
+
+_MONTH = (r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+          r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?")
+_WEEKDAY = r"(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+_DAY = r"(?:[12]\d|3[01]|0?[1-9])(?:st|nd|rd|th)?"
+_DAY_RANGE = rf"{_DAY}(?:\s*[-\u2013]\s*{_DAY})?"
+_YEAR = r"(?:19|20)\d{2}"
+
+# Alternatives are tried in order at each position, so longer forms come first
+DATE_PATTERN = re.compile(
+    r"\b(?:"
+    rf"(?:{_WEEKDAY},?\s+)?(?:the\s+)?{_DAY}(?:\s+of)?\s+{_MONTH}(?:,?\s+{_YEAR})?"
+    rf"|(?:{_WEEKDAY},?\s+)?{_MONTH}\s+{_DAY_RANGE}(?:,?\s+{_YEAR})?"
+    rf"|{_MONTH}\s+{_YEAR}"
+    r"|\d{4}-\d{1,2}-\d{1,2}"
+    r"|\d{1,2}[/.]\d{1,2}[/.]\d{2,4}"
+    rf"|(?:next|this|last)\s+(?:{_WEEKDAY}|week(?:end)?|month|year)"
+    rf"|{_WEEKDAY}|today|tomorrow|yesterday"
+    r")\b",
+    re.IGNORECASE
+)
+
+# Places spaCy's small English model reliably tags as GPE/LOC
+GAZETTEER = (
+    "Amsterdam", "Athens", "Atlanta", "Auckland", "Austin", "Bangkok", "Barcelona", "Beijing",
+    "Bali", "Belgrade", "Berlin", "Bern", "Bogota", "Boston", "Brighton", "Brisbane", "Bristol", "Brooklyn",
+    "Brussels", "Bucharest", "Budapest", "Buenos Aires", "Cairo", "Cannes", "Cape Town", "Chicago",
+    "Cologne", "Copenhagen", "Dallas", "Delhi", "Denver", "Detroit", "Dubai", "Dublin",
+    "Edinburgh", "Florence", "Frankfurt", "Galway", "Geneva", "Glasgow", "Hamburg", "Helsinki",
+    "Hong Kong", "Houston", "Istanbul", "Jakarta", "Johannesburg", "Kyiv", "Kyoto", "Lagos", "Leeds",
+    "Leipzig", "Lima", "Lisbon", "Liverpool", "London", "Los Angeles", "Lyon", "Madrid",
+    "Manchester", "Marseille", "Melbourne", "Mexico City", "Miami", "Milan", "Montreal",
+    "Moscow", "Mumbai", "Munich", "Nairobi", "Naples", "New Orleans", "New York",
+    "New York City", "Oslo", "Ottawa", "Paris", "Philadelphia", "Portland", "Porto",
+    "Prague", "Reykjavik", "Rio de Janeiro", "Rome", "Rotterdam", "San Diego",
+    "San Francisco", "Santiago", "Sao Paulo", "Seattle", "Seoul", "Seville", "Shanghai",
+    "Singapore", "Stockholm", "Sydney", "Taipei", "Tallinn", "Tokyo", "Toronto", "Utrecht", "Valencia",
+    "Vancouver", "Venice", "Vienna", "Vilnius", "Warsaw", "Washington", "Zurich",
+    "Argentina", "Australia", "Austria", "Belgium", "Brazil", "Canada", "Chile", "China",
+    "Colombia", "Croatia", "Czechia", "Denmark", "Egypt", "England", "Estonia", "Finland",
+    "France", "Germany", "Greece", "Hungary", "Iceland", "India", "Indonesia", "Ireland",
+    "Italy", "Japan", "Kenya", "Latvia", "Lithuania", "Mexico", "Morocco", "Netherlands",
+    "New Zealand", "Nigeria", "Norway", "Peru", "Poland", "Portugal", "Romania", "Scotland",
+    "Serbia", "South Africa", "South Korea", "Spain", "Sweden", "Switzerland", "Thailand",
+    "Turkey", "Ukraine", "United Kingdom", "United States", "Vietnam", "Wales",
+    "California", "Texas", "Florida", "Bavaria", "Catalonia", "Europe", "Africa", "Asia",
+)
+
+# Longest names first so "New York City" wins over "New York"
+LOCATION_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(name) for name in sorted(GAZETTEER, key=len, reverse=True)) + r")\b"
+)
+
+# Fallback for places missing from the gazetteer: capitalized words right after "in"
+CAPITALIZED_AFTER_IN = re.compile(r"\bin\s+([A-Z][\w'-]*(?:\s+[A-Z][\w'-]*)*)")
+
+def _find_date(text: str) -> Optional[Match]:
+    found = DATE_PATTERN.search(text)
+    if found is None:
+        return None
+    return Match(found.start(), found.end(), found.group())
+
+def _find_location(text: str, date: Optional[Match]) -> Tuple[Optional[Match], float]:
+    def clashes(start, end):
+        return date is not None and start < date.end_char and date.start_char < end
+
+    for found in LOCATION_PATTERN.finditer(text):
+        if not clashes(found.start(), found.end()):
+            return Match(found.start(), found.end(), found.group()), 1.0
+    for found in CAPITALIZED_AFTER_IN.finditer(text):
+        if not clashes(found.start(1), found.end(1)):
+            return Match(found.start(1), found.end(1), found.group(1)), 0.6
+    return None, 0.5
+
+def extract_with_confidence(text: str) -> Tuple[dict, float]:
+    """
+    Rule-based counterpart of extract_event_info.
+    Returns the same event info dict plus a confidence in [0, 1]: 1.0 when a date
+    pattern and a gazetteer place were both found, lower when a field was guessed or missing.
+    """
+    date = _find_date(text)
+    location, location_confidence = _find_location(text, date)
+    date_confidence = 1.0 if date is not None else 0.5
+    info = event_info_from_spans(text, date, location)
+    return info, (date_confidence + location_confidence) / 2
+
+def extract_event_info(text: str) -> dict:
+    return extract_with_confidence(text)[0]
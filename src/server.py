@@ -0,0 +1,278 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+import batch
+from encoders import FORMATS
+from extractors import get_extractor
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_SIDE = 8192  # Largest width or height a request may ask for
+MAX_CANDIDATES = 16  # Most layouts a request may have planned per poster
+# Encoder options a request may set, with the ranges Pillow accepts
+OPTION_RANGES = {"compress_level": (0, 9), "quality": (1, 100)}
+CONTENT_TYPES = {"png": "image/png", "webp": "image/webp", "jpeg": "image/jpeg"}
+
+class RequestError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+def parse_render_request(body: bytes):
+    """
+    Validates a /render body: {"text": ..., "seed": 1, "format": "png", "compress_level": 1,
+    "quality": 90, "width": 270, "height": 338, "candidates": 4}. Only "text" is required.
+    Returns (text, seed, fmt, encode_options, target_size, layout_candidates),
+    target_size being None for the design size.
+    """
+    try:
+        request = json.loads(body)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"invalid JSON: {e}")
+    if not isinstance(request, dict):
+        raise RequestError(HTTPStatus.BAD_REQUEST, "expected a JSON object")
+    text = request.get("text")
+    if not isinstance(text, str) or not text.strip():
+        raise RequestError(HTTPStatus.BAD_REQUEST, "'text' must be a non-empty string")
+    fmt = request.get("format", "png")
+    if fmt not in FORMATS:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"'format' must be one of {sorted(FORMATS)}")
+    options = {}
+    for name in ("seed", "compress_level", "quality", "width", "height", "candidates"):
+        value = request.get(name)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"'{name}' must be an integer")
+        if value is not None and name in OPTION_RANGES:
+            low, high = OPTION_RANGES[name]
+            if not low <= value <= high:
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"'{name}' must be {low}-{high}")
+            options[name] = value
+    target_size = None
+    if request.get("width") is not None or request.get("height") is not None:
+        width, height = request.get("width"), request.get("height")
+        if width is None or height is None or not (0 < width <= MAX_SIDE and 0 < height <= MAX_SIDE):
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"'width' and 'height' go together, each 1-{MAX_SIDE}")
+        target_size = (width, height)
+    candidates = request.get("candidates", 1)
+    if not 1 <= candidates <= MAX_CANDIDATES:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"'candidates' must be 1-{MAX_CANDIDATES}")
+    return text, request.get("seed"), fmt, options, target_size, candidates
+
+class PosterServer:
+    """
+    Minimal HTTP/1.1 poster service on asyncio streams.
+
+    POST /render takes a JSON body (see parse_render_request) and answers with the
+    poster bytes; GET /healthz reports load. Rendering happens in a pool of worker
+    processes that are forked once with the model, fonts and caches loaded.
+
+    Identical requests that arrive while one is rendering wait for that render
+    instead of starting their own. At most max_pending distinct renders are queued
+    or running; beyond that new work is refused with 503 so clients back off
+    instead of piling up latency.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        workers: Optional[int] = None,
+        max_pending: int = 64,
+        extractor: str = "spacy",
+        font_path: Optional[str] = None,
+        extraction_cache: Optional[str] = None,
+        timeout: float = 30.0
+    ):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.extractor = extractor
+        self.font_path = font_path
+        self.extraction_cache = extraction_cache
+        self.timeout = timeout
+        self.stats = {"requests": 0, "renders": 0, "coalesced": 0, "rejected": 0, "errors": 0}
+        self._inflight = {}
+        self._pool = None
+        self._server = None
+
+    async def start(self):
+        # Load the model before forking so every worker starts with it in memory
+        get_extractor(self.extractor).warm_up()
+        self._pool = ProcessPoolExecutor(
+            self.workers,
+            initializer=batch._init_worker,
+            initargs=(self.font_path, self.extractor, self.extraction_cache)
+        )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool, batch.worker_ready) for _ in range(self.workers)))
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    async def render(self, text: str, seed: Optional[int], fmt: str, options: dict,
+                     target_size: Optional[Tuple[int, int]] = None, layout_candidates: int = 1) -> bytes:
+        key = (text, seed, fmt, tuple(sorted(options.items())), target_size, layout_candidates)
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+        else:
+            if len(self._inflight) >= self.max_pending:
+                self.stats["rejected"] += 1
+                raise RequestError(HTTPStatus.SERVICE_UNAVAILABLE, "too many renders queued, retry later")
+            self.stats["renders"] += 1
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                self._pool, batch.render_poster_bytes, text, seed, fmt, options, target_size, layout_candidates
+            )
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        try:
+            # shield: one client giving up must not cancel the render others are waiting for
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise RequestError(HTTPStatus.GATEWAY_TIMEOUT, "render timed out")
+
+    async def _dispatch(self, method: str, target: str, body: bytes):
+        """Returns (status, content type, payload)."""
+        path = urlsplit(target).path
+        if path == "/healthz":
+            if method != "GET":
+                raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, "use GET")
+            health = {
+                "status": "ok",
+                "workers": self.workers,
+                "pending": len(self._inflight),
+                "max_pending": self.max_pending,
+                **self.stats,
+            }
+            return HTTPStatus.OK, "application/json", json.dumps(health).encode()
+        if path == "/render":
+            if method != "POST":
+                raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, "use POST")
+            text, seed, fmt, options, target_size, candidates = parse_render_request(body)
+            try:
+                image = await self.render(text, seed, fmt, options, target_size, candidates)
+            except RequestError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                raise RequestError(HTTPStatus.INTERNAL_SERVER_ERROR, f"render failed: {e}")
+            return HTTPStatus.OK, CONTENT_TYPES[fmt], image
+        raise RequestError(HTTPStatus.NOT_FOUND, f"no route for {path}")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await _respond(writer, HTTPStatus.BAD_REQUEST, "text/plain", b"bad request line\n", close=True)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                content_length = headers.get("content-length") or "0"
+                # Digits only: int() would also take signs, spaces and underscores
+                if not (content_length.isascii() and content_length.isdigit()):
+                    await _respond(writer, HTTPStatus.BAD_REQUEST, "text/plain", b"bad content-length\n", close=True)
+                    break
+                length = int(content_length)
+                if length > MAX_BODY_BYTES:
+                    await _respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "text/plain", b"body too large\n", close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                self.stats["requests"] += 1
+                try:
+                    status, content_type, payload = await self._dispatch(method, target, body)
+                except RequestError as e:
+                    status, content_type = e.status, "application/json"
+                    payload = json.dumps({"error": str(e)}).encode()
+
+                close = version != "HTTP/1.1" or headers.get("connection", "").lower() == "close"
+                await _respond(writer, status, content_type, payload, close=close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+async def _respond(writer: asyncio.StreamWriter, status: HTTPStatus, content_type: str, payload: bytes, close: bool):
+    head = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(payload)}",
+    ]
+    if status == HTTPStatus.SERVICE_UNAVAILABLE:
+        head.append("Retry-After: 1")
+    if close:
+        head.append("Connection: close")
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+    await writer.drain()
+
+async def serve(**options):
+    """Runs a PosterServer until SIGINT/SIGTERM, then shuts the worker pool down with it."""
+    server = PosterServer(**options)
+    await server.start()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    print(f"Serving posters on http://{server.host}:{server.port} with {server.workers} workers", flush=True)
+    serving = asyncio.create_task(server.serve_forever())
+    try:
+        await stop.wait()
+    finally:
+        serving.cancel()
+        await server.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve posters over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="0 picks a free port")
+    parser.add_argument("--workers", type=int, default=None, help="Render processes (default: all CPUs)")
+    parser.add_argument("--max-pending", type=int, default=64,
+                        help="Distinct renders queued or running before requests get 503")
+    parser.add_argument("--extractor", default="spacy", choices=["spacy", "rules", "hybrid"])
+    parser.add_argument("--extraction-cache", metavar="DB", help="SQLite file to cache extraction results in")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds before a request gets 504")
+    args = parser.parse_args()
+
+    asyncio.run(serve(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_pending=args.max_pending,
+        extractor=args.extractor,
+        extraction_cache=args.extraction_cache,
+        timeout=args.timeout
+    ))
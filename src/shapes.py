@@ -1,43 +1,228 @@
 import random
+import numpy as np
+from PIL import Image, ImageDraw
 
-def draw_random_shape(draw, palette, width, height):
-    shape_type = random.choice(["circle", "rectangle", "line"])
-    color = random.choice(palette)
+CIRCLE, RECTANGLE, LINE = 0, 1, 2
+
+class ShapeBatch:
+    """
+    Shapes queued up and drawn onto a canvas in one go.
+
+    Shapes are filled by Pillow's C rasterizer into an 8-bit label image, one byte
+    per pixel holding the shape's color slot, and the labels are then colored and
+    composited onto the canvas in a single pass. Filling one byte per pixel instead
+    of four is what makes big overlapping backgrounds faster; the composite costs
+    a fixed few milliseconds, so batches under DIRECT_LIMIT shapes are simply drawn
+    straight onto the canvas. Either way later shapes cover earlier ones, exactly as
+    with one ImageDraw call per shape.
+    """
+    MAX_COLORS = 255  # Label 0 means "no shape"
+    DIRECT_LIMIT = 256
+
+    def __init__(self):
+        self._shapes = []
+
+    def __len__(self):
+        return len(self._shapes)
+
+    def add_ellipse(self, x1, y1, x2, y2, color):
+        self._shapes.append((CIRCLE, (x1, y1, x2, y2), 0, tuple(color)))
+
+    def add_circle(self, x, y, r, color):
+        self.add_ellipse(x - r, y - r, x + r, y + r, color)
+
+    def add_rectangle(self, x1, y1, x2, y2, color):
+        self._shapes.append((RECTANGLE, (x1, y1, x2, y2), 0, tuple(color)))
+
+    def add_line(self, x1, y1, x2, y2, color, width=1):
+        self._shapes.append((LINE, (x1, y1, x2, y2), width, tuple(color)))
+
+    def add_circles(self, x, y, r, colors):
+        """Array form of add_circle; colors is one RGB triple or one per circle."""
+        x, y, r = (np.asarray(a).tolist() for a in np.broadcast_arrays(x, y, r))
+        for cx, cy, cr, color in zip(x, y, r, _color_list(colors, len(x))):
+            self._shapes.append((CIRCLE, (cx - cr, cy - cr, cx + cr, cy + cr), 0, color))
+
+    def add_rectangles(self, x1, y1, x2, y2, colors):
+        boxes = np.stack(np.broadcast_arrays(x1, y1, x2, y2), axis=-1).tolist()
+        for box, color in zip(boxes, _color_list(colors, len(boxes))):
+            self._shapes.append((RECTANGLE, tuple(box), 0, color))
+
+    def add_lines(self, x1, y1, x2, y2, colors, widths=1):
+        ends = np.stack(np.broadcast_arrays(x1, y1, x2, y2), axis=-1)
+        widths = np.broadcast_to(widths, ends.shape[:1]).tolist()
+        for end, width, color in zip(ends.tolist(), widths, _color_list(colors, len(widths))):
+            self._shapes.append((LINE, tuple(end), width, color))
+
+    def clear(self):
+        self._shapes.clear()
+
+    def render(self, img: Image.Image, scale: float = 1.0, band_height: int = 1024):
+        """
+        Draws every queued shape onto img, with coordinates and line widths
+        multiplied by scale, so one batch can fill a thumbnail and a print canvas.
+        Large batches are labelled band_height rows at a time, which keeps the
+        temporaries to a band instead of full-canvas images on big renders.
+        """
+        shapes = self._shapes if scale == 1 else [_scale_shape(shape, scale) for shape in self._shapes]
+        if len(shapes) < self.DIRECT_LIMIT:
+            draw = ImageDraw.Draw(img)
+            for kind, coords, width, color in shapes:
+                _draw_shape(draw, kind, coords, width, color)
+            return
+        for group, palette in _color_groups(shapes, self.MAX_COLORS):
+            for top in range(0, img.height, band_height):
+                _render_band(img, group, palette, top, min(top + band_height, img.height))
+
+def _scale_shape(shape, scale: float):
+    kind, coords, width, color = shape
+    coords = tuple(round(value * scale) for value in coords)
+    return kind, coords, max(1, round(width * scale)) if kind == LINE else width, color
+
+def _color_groups(shapes, max_colors: int):
+    """
+    Splits shapes into runs that use at most max_colors colors, yielding each run with
+    its colors replaced by label slots plus the palette mapping slots back to colors.
+    """
+    group, slots = [], {}
+    for kind, coords, width, color in shapes:
+        slot = slots.get(color)
+        if slot is None:
+            if len(slots) == max_colors:
+                yield group, _slot_palette(slots)
+                group, slots = [], {}
+            slot = slots[color] = len(slots) + 1
+        group.append((kind, coords, width, slot))
+    if group:
+        yield group, _slot_palette(slots)
+
+def _slot_palette(slots) -> list:
+    palette = [0, 0, 0]  # Slot 0, never shown
+    for color in slots:
+        palette.extend(color[:3])
+    return palette
+
+def _vertical_extent(kind, coords, width):
+    top, bottom = min(coords[1], coords[3]), max(coords[1], coords[3])
+    if kind == LINE:
+        return top - width, bottom + width
+    return top, bottom
+
+def _render_band(img: Image.Image, group, palette, top: int, bottom: int):
+    labels = Image.new("L", (img.width, bottom - top), 0)
+    draw = ImageDraw.Draw(labels)
+    for kind, coords, width, slot in group:
+        shape_top, shape_bottom = _vertical_extent(kind, coords, width)
+        if shape_bottom < top or shape_top >= bottom:
+            continue
+        x1, y1, x2, y2 = coords
+        _draw_shape(draw, kind, (x1, y1 - top, x2, y2 - top), width, slot)
+
+    bbox = labels.getbbox()
+    if bbox is None:
+        return
+    labels = labels.crop(bbox)
+    mask = labels.point([0] + [255] * 255)
+    labels.putpalette(palette)
+    img.paste(labels.convert(img.mode), (bbox[0], top + bbox[1]), mask)
+
+def _draw_shape(draw, kind, coords, width, fill):
+    if kind == CIRCLE:
+        draw.ellipse(coords, fill=fill)
+    elif kind == RECTANGLE:
+        draw.rectangle(coords, fill=fill)
+    else:
+        draw.line(coords, fill=fill, width=width)
+
+def _color_list(colors, count):
+    colors = np.asarray(colors)
+    if colors.ndim == 1:
+        colors = np.broadcast_to(colors, (count, colors.shape[0]))
+    return [tuple(color) for color in colors.tolist()]
+
+def random_shape_batch(count, palette, width, height, seed=None) -> ShapeBatch:
+    """
+    count shapes with draw_random_shape's distributions, drawn as NumPy arrays
+    in a few calls instead of six random calls per shape.
+    """
+    rng = np.random.default_rng(seed)
+    kinds = rng.integers(0, 3, count)
+    colors = np.asarray(palette)[rng.integers(0, len(palette), count)]
+    x1 = rng.integers(0, width + 1, count)
+    y1 = rng.integers(0, height + 1, count)
+    x2 = rng.integers(0, width + 1, count)
+    y2 = rng.integers(0, height + 1, count)
+    radii = rng.integers(50, 301, count)
+    widths = rng.integers(5, 21, count)
+    # Rectangles need their second corner below and right of the first
+    right = x1 + (rng.random(count) * (width - x1 + 1)).astype(int)
+    bottom = y1 + (rng.random(count) * (height - y1 + 1)).astype(int)
+
+    batch = ShapeBatch()
+    columns = (kinds, colors, x1, y1, x2, y2, radii, widths, right, bottom)
+    for kind, color, ax, ay, bx, by, r, line_width, rx, ry in zip(*(column.tolist() for column in columns)):
+        if kind == CIRCLE:
+            batch.add_circle(ax, ay, r, color)
+        elif kind == RECTANGLE:
+            batch.add_rectangle(ax, ay, rx, ry, color)
+        else:
+            batch.add_line(ax, ay, bx, by, color, line_width)
+    return batch
+
+def draw_random_shape(draw, palette, width, height, rng=random, batch=None):
+    """Draws one random shape, or queues it on batch (a ShapeBatch) when one is given."""
+    shape_type = rng.choice(["circle", "rectangle", "line"])
+    color = rng.choice(palette)
     
     if shape_type == "circle":
-        r = random.randint(50, 300)
-        x, y = random.randint(0, width), random.randint(0, height)
-        draw.ellipse((x-r, y-r, x+r, y+r), fill=color)
+        r = rng.randint(50, 300)
+        x, y = rng.randint(0, width), rng.randint(0, height)
+        if batch is not None:
+            batch.add_circle(x, y, r, color)
+        else:
+            draw.ellipse((x-r, y-r, x+r, y+r), fill=color)
     
     elif shape_type == "rectangle":
-        x1, y1 = random.randint(0, width), random.randint(0, height)
-        x2, y2 = random.randint(x1, width), random.randint(y1, height)
-        draw.rectangle((x1, y1, x2, y2), fill=color)
+        x1, y1 = rng.randint(0, width), rng.randint(0, height)
+        x2, y2 = rng.randint(x1, width), rng.randint(y1, height)
+        if batch is not None:
+            batch.add_rectangle(x1, y1, x2, y2, color)
+        else:
+            draw.rectangle((x1, y1, x2, y2), fill=color)
     
     elif shape_type == "line":
-        x1, y1 = random.randint(0, width), random.randint(0, height)
-        x2, y2 = random.randint(0, width), random.randint(0, height)
-        draw.line((x1, y1, x2, y2), fill=color, width=random.randint(5, 20))
+        x1, y1 = rng.randint(0, width), rng.randint(0, height)
+        x2, y2 = rng.randint(0, width), rng.randint(0, height)
+        line_width = rng.randint(5, 20)
+        if batch is not None:
+            batch.add_line(x1, y1, x2, y2, color, line_width)
+        else:
+            draw.line((x1, y1, x2, y2), fill=color, width=line_width)
         
 		
-def draw_shape_by_name(draw, shape_name, palette, width, height):
-    color = random.choice(palette)
+def draw_shape_by_name(draw, shape_name, palette, width, height, rng=random, batch=None):
+    color = rng.choice(palette)
     if shape_name == "heart":
         # Simplified heart shape using polygons or bezier curves (can be refined)
         # For now, draw a red circle as a placeholder:
         cx, cy = width // 2, height // 2
         r = 150
-        draw.ellipse((cx - r, cy - r, cx + r, cy + r), fill=color)
+        ellipse = (cx - r, cy - r, cx + r, cy + r)
     elif shape_name == "leaf":
         # Draw a green ellipse or polygon representing a leaf
         cx, cy = width // 2, height // 2
-        draw.ellipse((cx - 120, cy - 60, cx + 120, cy + 60), fill=color)
+        ellipse = (cx - 120, cy - 60, cx + 120, cy + 60)
     elif shape_name == "circle":
         cx, cy = width // 2, height // 2
         r = 200
-        draw.ellipse((cx - r, cy - r, cx + r, cy + r), fill=color)
+        ellipse = (cx - r, cy - r, cx + r, cy + r)
     else:
         # fallback random shape
-        from shapes import draw_random_shape
-        draw_random_shape(draw, palette, width, height)
+        draw_random_shape(draw, palette, width, height, rng, batch=batch)
+        return
+
+    if batch is not None:
+        batch.add_ellipse(*ellipse, color)
+    else:
+        draw.ellipse(ellipse, fill=color)
 
@@ -0,0 +1,157 @@
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Tuple
+from PIL import Image, ImageDraw, ImageFont
+import tracing
+from font_cache import font_key
+from text_metrics import text_bbox
+from wrapping import LINE_SPACING
+
+SPRITE_CACHE_BYTES = 64 * 1024 * 1024
+# Larger sprites (print-size text, which rarely repeats) are drawn once and not kept
+MAX_SPRITE_BYTES = 1024 * 1024
+SPRITE_PADDING = 2  # Room for antialiasing at the ink's edges
+
+# Right angles are exact pixel permutations, so they skip rotate()'s resampling
+_TRANSPOSES = {
+    90: Image.Transpose.ROTATE_90,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_270,
+}
+
+class TextSprite(NamedTuple):
+    mask: Image.Image       # "L" coverage tile cropped to its visible pixels
+    offset: Tuple[int, int] # Paste position relative to the text box's top-left corner
+
+    def paste(self, img: Image.Image, position: Tuple[int, int], color):
+        """Draws the sprite onto img in color, with its text box's top-left corner at position."""
+        img.paste(color, (position[0] + self.offset[0], position[1] + self.offset[1]), self.mask)
+
+class SpriteCache:
+    """
+    LRU cache of rendered text sprites, bounded by the bytes of pixel data it holds.
+    """
+
+    def __init__(self, max_bytes: int = SPRITE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            sprite = self._entries.get(key)
+            if sprite is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return sprite
+
+    def put(self, key, sprite: TextSprite):
+        size = _sprite_bytes(sprite)
+        # A single huge sprite would flush everything else; just don't keep it
+        if size > min(MAX_SPRITE_BYTES, self.max_bytes // 8):
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = sprite
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= _sprite_bytes(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+def _sprite_bytes(sprite: TextSprite) -> int:
+    return sprite.mask.width * sprite.mask.height
+
+def render_text_sprite(
+    text: str,
+    font: ImageFont.FreeTypeFont,
+    rotation: float,
+    box_width: int,
+    box_height: int,
+    spacing: int = LINE_SPACING
+) -> TextSprite:
+    """
+    Render text rotated by rotation degrees as a coverage mask, ready to paste in
+    any color. One byte per pixel keeps print-size tiles a quarter of RGBA's size.
+    box_width/box_height is the rotated text box the layout reserved; the rotated
+    glyphs are centred on it. spacing is the gap between lines of multiline text.
+    """
+    # Draw the glyphs into a tile just big enough for their ink, so nothing is
+    # clipped before rotating at any font size
+    left, top, right, bottom = text_bbox(text, font, spacing)
+    temp_img = Image.new("L", (right - left + 2 * SPRITE_PADDING, bottom - top + 2 * SPRITE_PADDING), 0)
+    temp_draw = ImageDraw.Draw(temp_img)
+    temp_draw.text((SPRITE_PADDING - left, SPRITE_PADDING - top), text, font=font, fill=255, spacing=spacing)
+
+    angle = rotation % 360
+    if angle in _TRANSPOSES:
+        rotated = temp_img.transpose(_TRANSPOSES[angle])
+    else:
+        rotated = temp_img.rotate(rotation, expand=True)
+    # Free the intermediate tiles now rather than whenever the garbage collector gets to them
+    temp_img.close()
+
+    offset_x = (box_width - rotated.width) // 2
+    offset_y = (box_height - rotated.height) // 2
+
+    # Drop the fully transparent padding; it would only cost memory and paste time
+    visible = rotated.getbbox()
+    if visible is None:
+        rotated.close()
+        return TextSprite(Image.new("L", (0, 0)), (offset_x, offset_y))
+    sprite = TextSprite(rotated.crop(visible), (offset_x + visible[0], offset_y + visible[1]))
+    rotated.close()
+    return sprite
+
+_cache = SpriteCache()
+
+def get_text_sprite(
+    text: str,
+    font: ImageFont.FreeTypeFont,
+    rotation: float,
+    box_width: int,
+    box_height: int,
+    spacing: int = LINE_SPACING
+) -> TextSprite:
+    """
+    Cached render_text_sprite(). The key covers text, font file and size
+    (which already includes any stretch), rotation and line spacing; color is
+    applied on paste.
+    """
+    key = (text, font_key(font), rotation, box_width, box_height, spacing)
+    sprite = _cache.get(key)
+    if sprite is None:
+        tracing.count("sprite.miss")
+        sprite = render_text_sprite(text, font, rotation, box_width, box_height, spacing)
+        _cache.put(key, sprite)
+    else:
+        tracing.count("sprite.hit")
+    return sprite
+
+def sprite_cache_stats() -> dict:
+    return _cache.stats()
+
+def clear_sprite_cache():
+    _cache.clear()
@@ -0,0 +1,243 @@
+import os
+import queue
+import random
+import threading
+from typing import Iterable, Iterator, Optional, Tuple
+from PIL import Image
+
+from batch import PosterResult, _extract_chunk, _extraction_failed
+from encoders import encode_image, extension_for, save_encoded
+from extractors import get_extractor
+from output_store import derive_seed
+from poster_generator import HEIGHT, WIDTH, render_poster
+import tracing
+from typography import resolve_font_path
+
+# Passed down the stages after the last item
+_DONE = object()
+# How often blocked stages check whether the pipeline is shutting down, in seconds
+_POLL_INTERVAL = 0.1
+
+class CanvasPool:
+    """
+    A fixed set of preallocated RGB canvases that posters are rendered into and
+    handed back after encoding, so a long run reuses the same pixel buffers instead
+    of allocating and freeing a poster-sized image every time. acquire() blocks
+    while every canvas is in use, which also caps the rendered-but-unencoded posters.
+    """
+
+    def __init__(self, count: int = 4, size: Tuple[int, int] = (WIDTH, HEIGHT)):
+        self.size = tuple(size)
+        self.count = count
+        self._free = queue.Queue()
+        for _ in range(count):
+            self._free.put(Image.new("RGB", self.size))
+
+    def acquire(self, timeout: Optional[float] = None) -> Image.Image:
+        """A free canvas (with the previous poster still on it); raises queue.Empty on timeout."""
+        return self._free.get(timeout=timeout)
+
+    def release(self, canvas: Image.Image):
+        self._free.put(canvas)
+
+    def close(self):
+        """Frees the canvases that are back in the pool."""
+        while True:
+            try:
+                self._free.get_nowait().close()
+            except queue.Empty:
+                return
+
+class DirectorySink:
+    """Writes each encoded poster to out_dir as poster-NNNNNN.ext, like batch.generate_posters."""
+
+    def __init__(self, out_dir, fmt: str = "png"):
+        self.out_dir = str(out_dir)
+        self.extension = extension_for(fmt)
+        os.makedirs(self.out_dir, exist_ok=True)
+
+    def __call__(self, index: int, text: str, data: bytes) -> str:
+        path = os.path.join(self.out_dir, f"poster-{index:06d}{self.extension}")
+        save_encoded(data, path)
+        return path
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Blocking put that gives up (returning False) once stop is set."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def _get(q: queue.Queue, stop: threading.Event):
+    """Blocking get that returns _DONE once stop is set."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            pass
+    return _DONE
+
+def stream_posters(
+    texts: Iterable[str],
+    sink,
+    font_path: Optional[str] = None,
+    extractor: str = "spacy",
+    seed: Optional[int] = None,
+    fmt: str = "png",
+    encode_options: Optional[dict] = None,
+    target_size: Optional[Tuple[int, int]] = None,
+    layout_candidates: int = 1,
+    batch_size: int = 32,
+    queue_size: int = 64,
+    canvases: int = 4,
+    tracer: Optional[tracing.MetricsTracer] = None
+) -> Iterator[PosterResult]:
+    """
+    Render one poster per text in a single process with memory that stays flat
+    however long texts is, e.g. a file read lazily with batch.read_events.
+
+    Reading, extraction, layout and rendering, and encoding plus the sink each run
+    on their own thread, connected by queues of at most queue_size items, so a slow
+    stage holds the others back instead of letting work pile up. Rendering draws into
+    a CanvasPool of canvases preallocated at target_size (default: the design size),
+    and each canvas goes back to the pool as soon as its poster is encoded.
+
+    sink is called as sink(index, text, data) with the encoded bytes and returns
+    where the poster went (or None); a directory path is shorthand for DirectorySink.
+    Results are yielded in input order, with failures reported per item. seed, fmt,
+    encode_options and layout_candidates work as in batch.generate_posters; metrics go to tracer.
+    Closing the generator early stops the pipeline.
+    """
+    if isinstance(sink, (str, os.PathLike)):
+        sink = DirectorySink(sink, fmt)
+    if font_path is None:
+        font_path = str(resolve_font_path("regular"))
+    encode_options = encode_options or {}
+    backend = get_extractor(extractor)
+    backend.warm_up()
+    pool = CanvasPool(canvases, target_size or (WIDTH, HEIGHT))
+
+    stop = threading.Event()
+    failures = []
+    texts_q = queue.Queue(queue_size)
+    infos_q = queue.Queue(queue_size)
+    images_q = queue.Queue(canvases)
+    results_q = queue.Queue(queue_size)
+
+    def read():
+        for item in enumerate(texts):
+            if not _put(texts_q, item, stop):
+                return
+        _put(texts_q, _DONE, stop)
+
+    def extract():
+        done = False
+        while not done:
+            item = _get(texts_q, stop)
+            if item is _DONE:
+                break
+            # Take whatever else is already waiting, up to batch_size, without waiting for more
+            chunk = [item]
+            while len(chunk) < batch_size:
+                try:
+                    item = texts_q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    done = True
+                    break
+                chunk.append(item)
+            with tracing.span("extract"):
+                infos = _extract_chunk([text for _, text in chunk], len(chunk), backend)
+            for (index, text), info in zip(chunk, infos):
+                if not _put(infos_q, (index, text, info), stop):
+                    return
+        _put(infos_q, _DONE, stop)
+
+    def render():
+        while True:
+            item = _get(infos_q, stop)
+            if item is _DONE:
+                break
+            index, text, info = item
+            if isinstance(info, Exception):
+                result = _extraction_failed(index, text, info)
+            else:
+                canvas = None
+                while canvas is None and not stop.is_set():
+                    try:
+                        canvas = pool.acquire(timeout=_POLL_INTERVAL)
+                    except queue.Empty:
+                        pass
+                if canvas is None:
+                    return
+                try:
+                    with tracing.span("poster"):
+                        rng = random.Random(derive_seed(seed, text)) if seed is not None else None
+                        result = render_poster(info, font_path, rng=rng, layout_candidates=layout_candidates,
+                                               target_size=pool.size, canvas=canvas)
+                except Exception as e:
+                    pool.release(canvas)
+                    result = PosterResult(index, text, None, f"render failed: {e}")
+            if not _put(images_q, (index, text, result), stop):
+                return
+        _put(images_q, _DONE, stop)
+
+    def encode():
+        while True:
+            item = _get(images_q, stop)
+            if item is _DONE:
+                break
+            index, text, result = item
+            if not isinstance(result, PosterResult):
+                canvas = result
+                try:
+                    with tracing.span("encode"):
+                        data = encode_image(canvas, fmt, **encode_options)
+                except Exception as e:
+                    result = PosterResult(index, text, None, f"encode failed: {e}")
+                else:
+                    try:
+                        result = PosterResult(index, text, sink(index, text, data), None)
+                    except Exception as e:
+                        result = PosterResult(index, text, None, f"write failed: {e}")
+                    del data
+                finally:
+                    pool.release(canvas)
+            if not _put(results_q, result, stop):
+                return
+        _put(results_q, _DONE, stop)
+
+    def run(stage):
+        try:
+            stage()
+        except BaseException as e:
+            failures.append(e)
+            stop.set()
+
+    previous_tracer = tracing.get_tracer()
+    if tracer is not None:
+        tracing.set_tracer(tracer)
+    threads = [
+        threading.Thread(target=run, args=(stage,), name=f"poster-{stage.__name__}", daemon=True)
+        for stage in (read, extract, render, encode)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            result = _get(results_q, stop)
+            if result is _DONE:
+                break
+            yield result
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        pool.close()
+        tracing.set_tracer(previous_tracer)
+    if failures:
+        raise failures[0]
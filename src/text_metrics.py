@@ -0,0 +1,47 @@
+from functools import lru_cache
+from typing import Optional, Tuple
+from PIL import Image, ImageDraw, ImageFont
+from font_cache import get_font
+from wrapping import LINE_SPACING
+
+MEASURE_CACHE_SIZE = 4096
+
+# One scratch context for the rare multiline strings, which need ImageDraw's line spacing
+_scratch_draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+
+# Keyed like font_cache.get_font rather than on the font object, so the memo keeps no
+# fonts alive and a font reloaded at the same size still hits
+@lru_cache(maxsize=MEASURE_CACHE_SIZE)
+def _bbox(text: str, path: str, size: int, index: int, spacing: int) -> Tuple[int, int, int, int]:
+    font = get_font(path, size, index)
+    if spacing is not None:
+        return _scratch_draw.textbbox((0, 0), text, font=font, spacing=spacing)
+    # Same box ImageDraw.textbbox returns for a single line, without the draw context
+    return font.getbbox(text)
+
+def _line_spacing(text: str, spacing: int) -> Optional[int]:
+    # Single lines don't depend on the spacing; None keeps them to one memo entry
+    return spacing if "\n" in text or "\r" in text else None
+
+def text_bbox(text: str, font: ImageFont.FreeTypeFont, spacing: int = LINE_SPACING) -> Tuple[int, int, int, int]:
+    """
+    The (left, top, right, bottom) box ImageDraw.textbbox gives for text drawn at (0, 0),
+    with spacing pixels between lines.
+    """
+    return _bbox(text, font.path, font.size, font.index, _line_spacing(text, spacing))
+
+def measure_text(text: str, font: ImageFont.FreeTypeFont, spacing: int = LINE_SPACING) -> Tuple[int, int]:
+    """
+    Returns the (width, height) of text's bounding box as drawn with font, with
+    spacing pixels between lines.
+    Results are memoized per (text, font file, size, face index), so repeated sizing
+    of the same strings is a dict lookup, and the memo holds no font objects.
+    """
+    left, top, right, bottom = _bbox(text, font.path, font.size, font.index, _line_spacing(text, spacing))
+    return right - left, bottom - top
+
+def measure_cache_info():
+    return _bbox.cache_info()
+
+def clear_measure_cache():
+    _bbox.cache_clear()
@@ -0,0 +1,169 @@
+import json
+import re
+import threading
+import time
+from typing import Optional
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, key, value):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class NullTracer:
+    """The default tracer: spans and counters cost a method call and nothing else."""
+    enabled = False
+
+    def span(self, name: str, **attrs):
+        return _NULL_SPAN
+
+    def count(self, name: str, value: int = 1):
+        pass
+
+class _Span:
+    __slots__ = ("tracer", "name", "attrs", "start")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer._finish(self, time.perf_counter() - self.start, exc_type)
+        return False
+
+    def set(self, key, value):
+        """Attach an attribute, e.g. the number of shrink iterations, to the recorded event."""
+        self.attrs[key] = value
+
+class MetricsTracer:
+    """
+    Records how often and how long each span ran (count/total/max) plus named counters.
+    With keep_events=True every finished span is also kept with its attributes,
+    up to max_events, to explain a single slow poster.
+    """
+    enabled = True
+
+    def __init__(self, keep_events: bool = False, max_events: int = 10000):
+        self.keep_events = keep_events
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.spans = {}
+            self.counters = {}
+            self.events = []
+
+    def span(self, name: str, **attrs):
+        return _Span(self, name, attrs)
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def _finish(self, span: _Span, duration: float, exc_type):
+        with self._lock:
+            stats = self.spans.get(span.name)
+            if stats is None:
+                stats = self.spans[span.name] = {"count": 0, "total_s": 0.0, "max_s": 0.0, "errors": 0}
+            stats["count"] += 1
+            stats["total_s"] += duration
+            stats["max_s"] = max(stats["max_s"], duration)
+            if exc_type is not None:
+                stats["errors"] += 1
+            if self.keep_events and len(self.events) < self.max_events:
+                self.events.append({
+                    "name": span.name,
+                    "start": span.start,
+                    "duration_s": duration,
+                    "thread": threading.get_ident(),
+                    "attrs": span.attrs,
+                })
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "spans": {name: dict(stats) for name, stats in self.spans.items()},
+                "counters": dict(self.counters),
+                "events": list(self.events),
+            }
+
+    def merge(self, snapshot: dict):
+        """Adds a snapshot from another tracer, e.g. one running in a worker process."""
+        with self._lock:
+            for name, other in snapshot["spans"].items():
+                stats = self.spans.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0, "errors": 0})
+                stats["count"] += other["count"]
+                stats["total_s"] += other["total_s"]
+                stats["max_s"] = max(stats["max_s"], other["max_s"])
+                stats["errors"] += other["errors"]
+            for name, value in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            if self.keep_events:
+                room = self.max_events - len(self.events)
+                self.events.extend(snapshot["events"][:max(0, room)])
+
+    def export_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def export_prometheus(self, path, prefix: str = "posterlab"):
+        """Writes the aggregates in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_span_seconds Time spent in each pipeline span.",
+            f"# TYPE {prefix}_span_seconds summary",
+        ]
+        for name, stats in sorted(snapshot["spans"].items()):
+            label = _label(name)
+            lines.append(f'{prefix}_span_seconds_count{{span="{label}"}} {stats["count"]}')
+            lines.append(f'{prefix}_span_seconds_sum{{span="{label}"}} {stats["total_s"]:.9f}')
+        lines.append(f"# TYPE {prefix}_span_seconds_max gauge")
+        for name, stats in sorted(snapshot["spans"].items()):
+            lines.append(f'{prefix}_span_seconds_max{{span="{_label(name)}"}} {stats["max_s"]:.9f}')
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append(f'{prefix}_events_total{{event="{_label(name)}"}} {value}')
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def export(self, path):
+        """Picks the format from the file name: .prom/.txt for Prometheus, JSON otherwise."""
+        if str(path).endswith((".prom", ".txt")):
+            self.export_prometheus(path)
+        else:
+            self.export_json(path)
+
+def _label(name: str) -> str:
+    return re.sub(r'["\\\n]', "_", name)
+
+_tracer = NullTracer()
+
+def get_tracer():
+    return _tracer
+
+def set_tracer(tracer: Optional[object]):
+    """Installs a process-wide tracer; None goes back to the no-op default."""
+    global _tracer
+    _tracer = tracer if tracer is not None else NullTracer()
+
+def span(name: str, **attrs):
+    """Context manager timing a pipeline stage on the current tracer."""
+    return _tracer.span(name, **attrs)
+
+def count(name: str, value: int = 1):
+    _tracer.count(name, value)
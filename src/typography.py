@@ -1,20 +1,17 @@
+import json
 import os
-import requests
 from pathlib import Path
-from PIL import ImageFont, ImageDraw
+from typing import Dict, Optional
+from PIL import ImageDraw
 import random
-import textwrap
-from dotenv import load_dotenv
-
-load_dotenv()  # Loads variables from .env into environment
-
-API_KEY = os.getenv("GOOGLE_FONTS_API_KEY")
-
-if not API_KEY:
-    raise ValueError("Google Fonts API key not found. Please set GOOGLE_FONTS_API_KEY in .env")
+import font_cache
+import palettes
+import tracing
+import wrapping
 
 FONT_FAMILY = "Roboto"
-FONT_DIR = Path("data/fonts")
+FONT_DIR = Path(__file__).resolve().parent.parent / "data" / "fonts"
+CATALOG_PATH = FONT_DIR / "webfonts.json"
 
 # Font paths for weights
 font_paths = {
@@ -24,107 +21,185 @@ font_paths = {
 	"light": FONT_DIR / "Roboto-Light.ttf",
 }
 
-def get_font_url(api_key, family, variant):
-    url = f"https://www.googleapis.com/webfonts/v1/webfonts?key={api_key}"
-    response = requests.get(url)
-    response.raise_for_status()
-    fonts = response.json().get("items", [])
-    for font in fonts:
+# Google Fonts uses variant keys like 'regular', 'italic', '700', etc.
+VARIANT_KEYS = {
+    "regular": "regular",
+    "bold": "700",
+    "medium": "500",
+    "light": "300",
+}
+
+class GoogleFontsFetcher:
+    """
+    Downloads the catalog and font files from the Google Fonts API.
+    The API key is only looked up once something actually has to be downloaded.
+    """
+    CATALOG_URL = "https://www.googleapis.com/webfonts/v1/webfonts?key={api_key}"
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key
+
+    def _get(self, url: str) -> bytes:
+        import requests
+
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+        return response.content
+
+    def fetch_catalog(self) -> bytes:
+        api_key = self.api_key
+        if not api_key:
+            from dotenv import load_dotenv
+
+            load_dotenv()  # Loads variables from .env into environment
+            api_key = os.getenv("GOOGLE_FONTS_API_KEY")
+        if not api_key:
+            raise ValueError("Google Fonts API key not found. Please set GOOGLE_FONTS_API_KEY in .env")
+        return self._get(self.CATALOG_URL.format(api_key=api_key))
+
+    def fetch_file(self, url: str) -> bytes:
+        return self._get(url)
+
+_fetcher = GoogleFontsFetcher()
+_catalog: Optional[dict] = None
+# variant -> font file found on disk, so each variant is resolved once per process
+_resolved_paths: Dict[str, Path] = {}
+
+def set_font_fetcher(fetcher):
+    """
+    Replaces the downloader. Anything with fetch_catalog() -> bytes (the catalog JSON)
+    and fetch_file(url) -> bytes works, e.g. a local stand-in for tests.
+    """
+    global _fetcher, _catalog
+    _fetcher = fetcher
+    _catalog = None
+
+def get_font_catalog() -> dict:
+    """
+    Returns the Google Fonts catalog, fetched at most once and then kept in CATALOG_PATH.
+    """
+    global _catalog
+    if _catalog is None:
+        if CATALOG_PATH.is_file():
+            _catalog = json.loads(CATALOG_PATH.read_bytes())
+        else:
+            data = _fetcher.fetch_catalog()
+            _catalog = json.loads(data)
+            FONT_DIR.mkdir(parents=True, exist_ok=True)
+            CATALOG_PATH.write_bytes(data)
+    return _catalog
+
+def get_font_url(family, variant):
+    key = VARIANT_KEYS.get(variant)
+    for font in get_font_catalog().get("items", []):
         if font["family"].lower() == family.lower():
             files = font.get("files", {})
-            # Google Fonts uses variant keys like 'regular', 'italic', '700', etc.
-            # Map variants to keys:
-            variant_key_map = {
-                "regular": "regular",
-                "bold": "700",
-                "medium": "500",
-                "light": "300",
-            }
-            key = variant_key_map.get(variant)
             if key and key in files:
                 return files[key]
     raise ValueError(f"Font '{family}' variant '{variant}' not found in Google Fonts API.")
 
+def download_font(variant) -> Path:
+    path = font_paths[variant]
+    data = _fetcher.fetch_file(get_font_url(FONT_FAMILY, variant))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+def find_bundled_font(variant) -> Optional[Path]:
+    """
+    Looks for the variant's file in FONT_DIR, ignoring case
+    (the bundled regular weight ships as Roboto-regular.ttf).
+    """
+    path = font_paths[variant]
+    if path.is_file():
+        return path
+    if FONT_DIR.is_dir():
+        name = path.name.lower()
+        for candidate in FONT_DIR.iterdir():
+            if candidate.name.lower() == name and candidate.is_file():
+                return candidate
+    return None
+
+def resolve_font_path(variant="regular", download=True) -> Path:
+    """
+    Returns the font file for a weight, preferring the bundled files in FONT_DIR.
+    Missing files are downloaded only when download is True.
+    """
+    if variant not in font_paths:
+        variant = "regular"
+    path = _resolved_paths.get(variant)
+    if path is None:
+        path = find_bundled_font(variant)
+        if path is None:
+            if not download:
+                raise FileNotFoundError(f"No {FONT_FAMILY} {variant} font in {FONT_DIR}")
+            path = download_font(variant)
+        _resolved_paths[variant] = path
+    return path
+
 def download_all_fonts():
-    if not FONT_DIR.exists():
-        FONT_DIR.mkdir(parents=True)
-    for variant, path in font_paths.items():
-        if not path.is_file():
+    for variant in font_paths:
+        if find_bundled_font(variant) is None:
             print(f"Downloading {FONT_FAMILY} {variant} font...")
-            font_url = get_font_url(API_KEY, FONT_FAMILY, variant)
-            r = requests.get(font_url)
-            r.raise_for_status()
-            with open(path, "wb") as f:
-                f.write(r.content)
+            path = download_font(variant)
             print(f"Downloaded {variant} font to {path}")
         else:
             print(f"{variant} font already downloaded.")
-            
+
 def get_font(variant="regular", size=40):
     """
     Returns a PIL ImageFont instance for given variant and size.
-    Downloads fonts if missing.
+    Downloads the font only if it is not bundled.
     """
-    if variant not in font_paths:
-        variant = "regular"
-    download_all_fonts()  # Ensures fonts are downloaded (idempotent)
-    return ImageFont.truetype(str(font_paths[variant]), size)
+    return font_cache.get_font(resolve_font_path(variant), size)
 
 def relative_luminance(rgb):
-    def channel_lum(c):
-        c = c / 255
-        return c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4
-    r, g, b = rgb
-    return 0.2126 * channel_lum(r) + 0.7152 * channel_lum(g) + 0.0722 * channel_lum(b)
+    return palettes.luminance(rgb)
 
 def contrast_ratio(c1, c2):
-    L1 = relative_luminance(c1)
-    L2 = relative_luminance(c2)
-    lighter = max(L1, L2)
-    darker = min(L1, L2)
-    return (lighter + 0.05) / (darker + 0.05)
+    return palettes.contrast_ratio(c1, c2)
 
 def get_accessible_text_color(bg_color, candidates=[(0,0,0), (255,255,255)]):    
-    # Try black or white text for sufficient contrast (4.5:1)
-    for color in candidates:
-        if contrast_ratio(bg_color, color) >= 4.5:
-            return color
-    # If neither passes, return color with highest contrast anyway
-    return max(candidates, key=lambda c: contrast_ratio(bg_color, c))
+    # First candidate with sufficient contrast (4.5:1), from the precomputed palette table;
+    # if none passes, the one with the highest contrast anyway
+    return palettes.pick_text_color(bg_color, candidates, palettes.WCAG_AA)
 
 def draw_text(draw, text, bg_color, width, height, font_size=None, max_width_ratio=0.8, line_spacing=10, variant="regular"):
     """
-    Draw wrapped multiline text with accessible contrast color.
+    Draw wrapped multiline text with accessible contrast color, centered on the canvas.
+    Line breaks, and a size below font_size if the text would not fit otherwise,
+    are chosen together from the font's advance widths (see wrapping.fit_lines).
+    Text too big for the canvas even at size 1 is still drawn, on one line at size 1.
     """
     if font_size is None:
         font_size = random.randint(80, 200)
 
+    table = wrapping.advance_table(resolve_font_path(variant))
+    fitted = wrapping.fit_lines(text, table, width * max_width_ratio, height, font_size, spacing=line_spacing)
+    if fitted is None:
+        if not text.split():
+            return
+        tracing.count("fit.failed")
+        print(f"Could not fit text '{text}' even at size 1")
+        fitted = (1, [" ".join(text.split())])
+    font_size, lines = fitted
     font = get_font(variant, font_size)
-    max_text_width = width * max_width_ratio
-
-    # Estimate max chars per line by average char width
-    avg_char_width = font.getlength("a")  # Pillow >=8.0
-    max_chars_per_line = max(10, int(max_text_width / avg_char_width))
-
-    lines = textwrap.wrap(text, width=max_chars_per_line)
-
-    # Calculate total height
-    line_heights = [font.getbbox(line)[3] - font.getbbox(line)[1] for line in lines]
-    total_text_height = sum(line_heights) + line_spacing * (len(lines) - 1)
+    scale = font_size / wrapping.REFERENCE_SIZE
 
-    # Vertical start (centered)
-    y = (height - total_text_height) // 2
+    # Vertical start (centered on the ink of the whole block)
+    _, block_height, spacing_height = table.block_extent(lines, line_spacing)
+    total_text_height = block_height * font_size + spacing_height
+    y = (height - total_text_height) / 2 - table.ink(lines[0])[0] * scale
+    line_pitch = table.line_pitch * scale + line_spacing
 
     text_color = get_accessible_text_color(bg_color)
 
-    for line, line_height in zip(lines, line_heights):
-        bbox = draw.textbbox((0, 0), line, font=font)
-        text_width = bbox[2] - bbox[0]
-        x = (width - text_width) // 2  # center horizontally
-        draw.text((x, y), line, font=font, fill=text_color)
-        y += line_height + line_spacing
+    for line in lines:
+        x = (width - table.width(line) * scale) / 2  # center horizontally
+        draw.text((round(x), round(y)), line, font=font, fill=text_color)
+        y += line_pitch
 
 def draw_text_line(draw, text, position, font_path, font_size, fill, anchor="lt"):
-    font = ImageFont.truetype(str(font_path), font_size)
+    font = font_cache.get_font(font_path, font_size)
     draw.text(position, text, font=font, fill=fill, anchor=anchor)
         
\ No newline at end of file
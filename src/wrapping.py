@@ -0,0 +1,174 @@
+import math
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import font_cache
+
+# Advances are measured once at this size and scaled to every other
+REFERENCE_SIZE = 1000
+# ImageDraw's default gap between the lines of multiline text, in pixels at any size
+LINE_SPACING = 4
+
+class AdvanceTable:
+    """
+    Advance widths of a font's characters, measured once per character at
+    REFERENCE_SIZE and scaled linearly, so the width of a word or line at any size
+    is a sum rather than a FreeType layout. Kerning and hinting are ignored, so the
+    results are estimates to confirm with one real measurement at the chosen size.
+    Tables are shared between threads (font_cache fonts lock their own face).
+    """
+
+    def __init__(self, font_path, index: int = 0):
+        self.font = font_cache.get_font(font_path, REFERENCE_SIZE, index)
+        self._advances = {}
+        self._ink = {}
+        # ImageDraw moves down by the height of "A" (plus the spacing) for each new line
+        self.line_pitch = self.font.getbbox("A")[3]
+        self.space = self.advance(" ")
+
+    def advance(self, char: str) -> float:
+        width = self._advances.get(char)
+        if width is None:
+            width = self._advances[char] = self.font.getlength(char)
+        return width
+
+    def width(self, text: str) -> float:
+        """Width of text at REFERENCE_SIZE."""
+        advances = self._advances
+        total = 0.0
+        for char in text:
+            width = advances.get(char)
+            total += width if width is not None else self.advance(char)
+        return total
+
+    def ink(self, text: str) -> Tuple[int, int]:
+        """Top and bottom of text's glyphs at REFERENCE_SIZE, relative to the line's top."""
+        top, bottom = self.line_pitch, 0
+        for char in text:
+            extent = self._ink.get(char)
+            if extent is None:
+                box = self.font.getbbox(char)
+                # Blank glyphs have an empty box; they shouldn't stretch the line
+                extent = self._ink[char] = (box[1], box[3]) if box[3] > box[1] else ()
+            if not extent:
+                continue
+            top, bottom = min(top, extent[0]), max(bottom, extent[1])
+        return top, bottom
+
+    def block_extent(self, lines: Sequence[str], spacing: float = LINE_SPACING) -> Tuple[float, float, float]:
+        """
+        (a, b, c) such that lines drawn as one multiline text at size, spacing
+        pixels apart, measure about a * size wide and b * size + c high, like
+        text_metrics.measure_text.
+        """
+        widest = max(self.width(line) for line in lines)
+        top = self.ink(lines[0])[0]
+        bottom = self.ink(lines[-1])[1]
+        b = ((len(lines) - 1) * self.line_pitch + bottom - top) / REFERENCE_SIZE
+        return widest / REFERENCE_SIZE, b, (len(lines) - 1) * spacing
+
+@lru_cache(maxsize=64)
+def advance_table(font_path, index: int = 0) -> AdvanceTable:
+    """The shared AdvanceTable for a font file (and face index)."""
+    return AdvanceTable(str(font_path), index)
+
+def _split_table(widths: Sequence[float], space: float, max_count: int) -> list:
+    """
+    best[m][j] = (widest, sum of squares, start of last line) of the best split of
+    the first j words into m lines, for every m up to max_count in one pass.
+    """
+    n = len(widths)
+    prefix = [0.0]
+    for width in widths:
+        prefix.append(prefix[-1] + width)
+
+    best = [{0: (0.0, 0.0, None)}]
+    for m in range(1, max_count + 1):
+        previous = best[-1]
+        row = {}
+        for j in range(m, n + 1):
+            choice = None
+            # Longer last lines first: once one is wider than the best split so far,
+            # every longer one is worse too
+            # The first line starts at word 0; later ones after at least m - 1 words
+            for i in range(j - 1 if m > 1 else 0, m - 2, -1):
+                width = prefix[j] - prefix[i] + space * (j - i - 1)
+                if choice is not None and width > choice[0]:
+                    break
+                widest, squares, _ = previous[i]
+                option = (max(widest, width), squares + width * width, i)
+                if choice is None or option < choice:
+                    choice = option
+            row[j] = choice
+        best.append(row)
+    return best
+
+def _trace(best: list, count: int, n: int) -> Tuple[float, List[Tuple[int, int]]]:
+    ranges = []
+    j = n
+    for m in range(count, 0, -1):
+        i = best[m][j][2]
+        ranges.append((i, j))
+        j = i
+    return best[count][n][0], ranges[::-1]
+
+def break_lines(widths: Sequence[float], space: float, count: int) -> Tuple[float, List[Tuple[int, int]]]:
+    """
+    Splits words of the given widths into exactly count lines, keeping their order,
+    so that the widest line is as narrow as possible; among such splits, the one
+    with the most even lines (least sum of squared widths). Returns the widest line's
+    width and each line as a (start, end) range of word indices.
+    """
+    n = len(widths)
+    if not 1 <= count <= n:
+        raise ValueError(f"can't split {n} words into {count} lines")
+    return _trace(_split_table(widths, space, count), count, n)
+
+def break_lines_upto(widths: Sequence[float], space: float, max_count: int) -> List[Tuple[float, List[Tuple[int, int]]]]:
+    """break_lines for every count from 1 to max_count (at most one line per word), from one table."""
+    n = len(widths)
+    max_count = min(max_count, n)
+    best = _split_table(widths, space, max_count)
+    return [_trace(best, count, n) for count in range(1, max_count + 1)]
+
+def wrap_words(words: Sequence[str], table: AdvanceTable, count: int) -> List[str]:
+    """words broken into count lines by break_lines."""
+    _, ranges = break_lines([table.width(word) for word in words], table.space, count)
+    return [" ".join(words[i:j]) for i, j in ranges]
+
+def fit_lines(
+    text: str,
+    table: AdvanceTable,
+    max_width: float,
+    max_height: float,
+    max_size: int,
+    min_size: int = 1,
+    max_lines: Optional[int] = None,
+    spacing: float = LINE_SPACING
+) -> Optional[Tuple[int, List[str]]]:
+    """
+    The largest size up to max_size, and the line breaks, at which text fits in a
+    max_width x max_height box, or None if it does not fit even at min_size.
+    Every line count is tried with its optimal breaks, all from one break_lines_upto
+    table, up to as many lines as fit in max_height at min_size. Block extents are
+    linear in the size, so each count's largest size is solved for directly. Ties go
+    to fewer lines.
+    """
+    words = text.split()
+    if not words:
+        return None
+    # Each line after the first adds at least its pitch at min_size plus the spacing
+    pitch = table.line_pitch * min_size / REFERENCE_SIZE + spacing
+    count_limit = math.floor(max_height / pitch) + 1 if pitch > 0 else len(words)
+    if max_lines:
+        count_limit = min(count_limit, max_lines)
+    best = None
+    for _, ranges in break_lines_upto([table.width(word) for word in words], table.space, max(1, count_limit)):
+        lines = [" ".join(words[i:j]) for i, j in ranges]
+        a, b, c = table.block_extent(lines, spacing)
+        size = min(max_size, math.floor((max_height - c) / b))
+        if a > 0:
+            size = min(size, math.floor(max_width / a))
+        if size >= min_size and (best is None or size > best[0]):
+            best = (size, lines)
+    return best
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from occupancy import OccupancyGrid
+
+def random_rects(rng, count, size=1000):
+    rects = []
+    for _ in range(count):
+        x, y = rng.randrange(size), rng.randrange(size)
+        rects.append((x, y, x + rng.randint(1, 200), y + rng.randint(1, 200)))
+    return rects
+
+def brute_is_free(rects, x1, y1, x2, y2, margin):
+    return all(x2 + margin <= ox1 or x1 >= ox2 + margin or y2 + margin <= oy1 or y1 >= oy2 + margin
+               for ox1, oy1, ox2, oy2 in rects)
+
+@pytest.mark.parametrize("cell_size", [16, 128, 1024])
+@pytest.mark.parametrize("count", [0, 1, 5, 40])
+def test_is_free_matches_brute_force(cell_size, count):
+    rng = random.Random(count * 1000 + cell_size)
+    rects = random_rects(rng, count)
+    grid = OccupancyGrid(rects, cell_size=cell_size)
+    for x1, y1, x2, y2 in random_rects(rng, 300):
+        margin = rng.choice([0, 1, 20])
+        assert grid.is_free(x1, y1, x2, y2, margin) == brute_is_free(rects, x1, y1, x2, y2, margin)
+
+def test_shared_edge_is_free_without_margin():
+    grid = OccupancyGrid([(0, 0, 100, 100)])
+    assert grid.is_free(100, 0, 200, 100)
+    assert not grid.is_free(100, 0, 200, 100, margin=1)
+
+def test_append_is_seen_by_queries():
+    grid = OccupancyGrid(cell_size=32)
+    assert grid.is_free(10, 10, 20, 20)
+    grid.append((0, 0, 50, 50))
+    assert not grid.is_free(10, 10, 20, 20)
+    assert len(grid) == 1 and grid[0] == (0, 0, 50, 50)
+
+def brute_nearest_free(grid, width, height, x, y, bounds, margin, step):
+    """Smallest squared lattice distance of any free position, or None."""
+    bx1, by1, bx2, by2 = bounds
+    best = None
+    for i in range(-100, 101):
+        for j in range(-100, 101):
+            px, py = x + i * step, y + j * step
+            if px < bx1 or py < by1 or px + width > bx2 or py + height > by2:
+                continue
+            if grid.is_free(px, py, px + width, py + height, margin):
+                distance = i * i + j * j
+                best = distance if best is None else min(best, distance)
+    return best
+
+@pytest.mark.parametrize("seed", range(40))
+def test_nearest_free_is_nearest(seed):
+    rng = random.Random(seed)
+    rects = random_rects(rng, rng.randint(0, 30))
+    grid = OccupancyGrid(rects)
+    width, height = rng.randint(10, 300), rng.randint(10, 300)
+    x, y = rng.randrange(1000), rng.randrange(1000)
+    step = rng.choice([25, 50, 100])
+    margin = rng.choice([0, 20])
+    bounds = (20, 20, 1060, 1330)
+
+    found = grid.nearest_free(width, height, x, y, bounds, margin=margin, step=step)
+    expected = brute_nearest_free(grid, width, height, x, y, bounds, margin, step)
+    if expected is None:
+        assert found is None
+        return
+    px, py = found
+    assert (px - x) % step == 0 and (py - y) % step == 0
+    assert bounds[0] <= px and bounds[1] <= py and px + width <= bounds[2] and py + height <= bounds[3]
+    assert grid.is_free(px, py, px + width, py + height, margin)
+    assert ((px - x) // step) ** 2 + ((py - y) // step) ** 2 == expected
+
+def test_nearest_free_none_when_box_does_not_fit_bounds():
+    grid = OccupancyGrid()
+    assert grid.nearest_free(500, 500, 0, 0, bounds=(0, 0, 400, 400)) is None
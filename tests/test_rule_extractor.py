@@ -0,0 +1,56 @@
+from pathlib import Path
+
+import pytest
+
+from rule_extractor import extract_event_info, extract_with_confidence
+
+CORPUS = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures" / "events.txt"
+
+def load_corpus():
+    return [line.strip() for line in CORPUS.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+@pytest.mark.parametrize("text", load_corpus())
+def test_fields_come_from_the_text(text):
+    info, confidence = extract_with_confidence(text)
+    assert set(info) == {"event_name", "date", "location"}
+    assert info["event_name"]
+    assert info["date"] in text
+    assert info["location"] in text
+    assert 0 <= confidence <= 1
+    assert extract_event_info(text) == info
+
+@pytest.mark.parametrize("text, expected", [
+    ("Jazz Night on March 5 in Berlin",
+     {"event_name": "Jazz Night", "date": "March 5", "location": "Berlin"}),
+    ("Design Week on October 2nd, 2025 in Milan",
+     {"event_name": "Design Week", "date": "October 2nd, 2025", "location": "Milan"}),
+    ("Film Festival on 5th of June 2025 in Cannes",
+     {"event_name": "Film Festival", "date": "5th of June 2025", "location": "Cannes"}),
+    ("Sustainability Summit on 2025-03-18 in Copenhagen",
+     {"event_name": "Sustainability Summit", "date": "2025-03-18", "location": "Copenhagen"}),
+    ("Street Food Festival next weekend in Bangkok",
+     {"event_name": "Street Food Festival", "date": "next weekend", "location": "Bangkok"}),
+    ("Techno Rave on Saturday, March 8 in Berlin",
+     {"event_name": "Techno Rave", "date": "Saturday, March 8", "location": "Berlin"}),
+    ("Hackathon on May 17-18 in San Francisco",
+     {"event_name": "Hackathon", "date": "May 17-18", "location": "San Francisco"}),
+    ("Robotics Expo in Seoul on 9 October",
+     {"event_name": "Robotics Expo", "date": "9 October", "location": "Seoul"}),
+    ("Carnival in Rio de Janeiro on February 28",
+     {"event_name": "Carnival", "date": "February 28", "location": "Rio de Janeiro"}),
+    ("Annual General Meeting on 12.04.2025 in Zurich",
+     {"event_name": "Annual General Meeting", "date": "12.04.2025", "location": "Zurich"}),
+])
+def test_corpus_examples(text, expected):
+    info, confidence = extract_with_confidence(text)
+    assert info == expected
+    assert confidence == 1.0
+
+@pytest.mark.parametrize("text", [
+    "Neighbourhood Cleanup on March 1",
+    "Sunrise Run in Cape Town",
+])
+def test_missing_field_lowers_confidence(text):
+    info, confidence = extract_with_confidence(text)
+    assert "" in (info["date"], info["location"])
+    assert confidence < 1.0
@@ -0,0 +1,49 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from server import MAX_CANDIDATES, MAX_SIDE, RequestError, parse_render_request
+
+def body(**fields) -> bytes:
+    return json.dumps(fields).encode()
+
+def test_minimal_request():
+    assert parse_render_request(body(text="Jazz night")) == ("Jazz night", None, "png", {}, None, 1)
+
+def test_full_request():
+    request = body(text="Jazz night", seed=7, format="webp", quality=80, compress_level=1,
+                   width=270, height=338, candidates=4)
+    assert parse_render_request(request) == (
+        "Jazz night", 7, "webp", {"quality": 80, "compress_level": 1}, (270, 338), 4
+    )
+
+@pytest.mark.parametrize("request_body", [
+    b"not json",
+    b"\xff\xfe",
+    b"[1, 2]",
+    body(),
+    body(text=""),
+    body(text="   "),
+    body(text=5),
+    body(text="x", format="gif"),
+    body(text="x", seed="1"),
+    body(text="x", seed=1.5),
+    body(text="x", seed=True),
+    body(text="x", quality=0),
+    body(text="x", quality=101),
+    body(text="x", compress_level=-1),
+    body(text="x", compress_level=10),
+    body(text="x", width=270),
+    body(text="x", height=338),
+    body(text="x", width=0, height=338),
+    body(text="x", width=270, height=MAX_SIDE + 1),
+    body(text="x", width="270", height=338),
+    body(text="x", candidates=0),
+    body(text="x", candidates=MAX_CANDIDATES + 1),
+    body(text="x", candidates="2"),
+])
+def test_bad_requests(request_body):
+    with pytest.raises(RequestError) as error:
+        parse_render_request(request_body)
+    assert error.value.status == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,56 @@
+import itertools
+import random
+
+import pytest
+
+from wrapping import break_lines, break_lines_upto
+
+def line_widths(widths, space, ranges):
+    return [sum(widths[i:j]) + space * (j - i - 1) for i, j in ranges]
+
+def exhaustive(widths, space, count):
+    """(widest line, sum of squared widths) of the best split, trying every one."""
+    n = len(widths)
+    best = None
+    for cuts in itertools.combinations(range(1, n), count - 1):
+        bounds = (0,) + cuts + (n,)
+        lines = line_widths(widths, space, list(zip(bounds, bounds[1:])))
+        score = (max(lines), sum(width * width for width in lines))
+        best = score if best is None else min(best, score)
+    return best
+
+def check_split(widths, space, count, widest, ranges):
+    assert len(ranges) == count
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(widths)
+    assert all(i < j for i, j in ranges)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    lines = line_widths(widths, space, ranges)
+    assert widest == max(lines)
+    assert (max(lines), sum(width * width for width in lines)) == exhaustive(widths, space, count)
+
+@pytest.mark.parametrize("seed", range(60))
+def test_break_lines_matches_exhaustive_splits(seed):
+    rng = random.Random(seed)
+    # Integer widths keep the sums exact, so ties compare equal
+    widths = [rng.randint(1, 60) for _ in range(rng.randint(1, 9))]
+    space = rng.randint(0, 15)
+    for count in range(1, len(widths) + 1):
+        check_split(widths, space, count, *break_lines(widths, space, count))
+
+@pytest.mark.parametrize("seed", range(20))
+def test_break_lines_upto_matches_break_lines(seed):
+    rng = random.Random(seed)
+    widths = [rng.randint(1, 60) for _ in range(rng.randint(1, 9))]
+    space = rng.randint(0, 15)
+    splits = break_lines_upto(widths, space, 5)
+    assert len(splits) == min(5, len(widths))
+    for count, (widest, ranges) in enumerate(splits, start=1):
+        check_split(widths, space, count, widest, ranges)
+
+def test_equal_words_split_evenly():
+    assert break_lines([10] * 6, 2, 3) == (22, [(0, 2), (2, 4), (4, 6)])
+
+@pytest.mark.parametrize("count", [0, 4])
+def test_break_lines_rejects_impossible_counts(count):
+    with pytest.raises(ValueError):
+        break_lines([1, 2, 3], 1, count)